@@ -6,17 +6,24 @@
     * The top entry in CHANGELOG.md is that of the release to be published.
     * Each entry is separated by a new line and starts with a line: "## vX.Y.Z"
 
+    CHANGELOG.md is read a line at a time, holding back only the previous line
+    so that the blank line separating the first entry from the next can be
+    dropped. Reading stops as soon as the second entry is reached.
+
 """
 if __name__ == '__main__':
-    with open('CHANGELOG.md', 'r', encoding='utf-8') as file_handler:
-        changelog_lines = file_handler.readlines()
+    with open('CHANGELOG.md', 'r', encoding='utf-8') as changelog, \
+         open('version_notes.md', 'w', encoding='utf-8') as version_notes:
+        previous_line = None
+
+        for line in changelog:
+            if previous_line == '\n' and line.startswith('## v'):
+                break
 
-    split_index = next((line_index
-                       for line_index, line
-                       in enumerate(changelog_lines[:-2])
-                       if line == '\n'
-                       and changelog_lines[line_index + 1].startswith('## v')),
-                       None)
+            if previous_line is not None:
+                version_notes.write(previous_line)
 
-    with open('version_notes.md', 'w', encoding='utf-8') as file_handler:
-        file_handler.writelines(changelog_lines[:split_index])
+            previous_line = line
+        else:
+            if previous_line is not None:
+                version_notes.write(previous_line)
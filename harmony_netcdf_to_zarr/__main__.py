@@ -12,16 +12,28 @@ if sys.version_info[0] != 3 or sys.version_info[1] < 6:
     raise Exception('You must use Python 3.6 or later')
 
 import argparse
+from os.path import abspath, dirname, join as path_join
 
-import harmony
 
-from .adapter import NetCDFToZarrAdapter as HarmonyAdapter
+# Arguments that can be answered without loading the Harmony service stack
+FAST_PATH_ARGUMENTS = ('-h', '--help', '--version')
+VERSION_FILE = path_join(dirname(dirname(abspath(__file__))), 'version.txt')
+
+
+def get_version() -> str:
+    """ Read the semantic version number of the service from version.txt """
+    with open(VERSION_FILE, 'r', encoding='utf-8') as file_handler:
+        return file_handler.read().strip()
 
 
 def main(argv, **kwargs):
     """
     Parses command line arguments and invokes the appropriate method to respond to them
 
+    Requests for help or the service version are answered before `harmony`
+    and the adapter are imported, as those bring in the full NetCDF-4, Zarr
+    and S3 stack.
+
     Returns
     -------
     None
@@ -33,6 +45,18 @@ def main(argv, **kwargs):
 
     parser = argparse.ArgumentParser(
         prog='harmony-netcdf-to-zarr', description='Run the NetCDF4 to Zarr')
+
+    if len(argv) > 1 and argv[1] in FAST_PATH_ARGUMENTS:
+        parser.add_argument('--version', action='version',
+                            version=f'%(prog)s {get_version()}')
+        parser.epilog = 'Run with --harmony-action to invoke the service.'
+        parser.parse_args(argv[1:])
+        return
+
+    import harmony
+
+    from .adapter import NetCDFToZarrAdapter as HarmonyAdapter
+
     harmony.setup_cli(parser)
     args = parser.parse_args(argv[1:])
     if (harmony.is_harmony_cli(args)):
@@ -5,20 +5,15 @@ adapter.py
 
 Service adapter for converting NetCDF4 to Zarr
 """
+from functools import cached_property
 from os import environ
 from os.path import join as path_join
 from shutil import rmtree
 from tempfile import mkdtemp
-from uuid import uuid4
 
 from harmony import BaseHarmonyAdapter
 from harmony.util import generate_output_filename, HarmonyException
 
-from harmony_netcdf_to_zarr.convert import make_localstack_s3fs, make_s3fs, mosaic_to_zarr
-from harmony_netcdf_to_zarr.rechunk import rechunk_zarr
-from harmony_netcdf_to_zarr.download_utilities import download_granules
-from harmony_netcdf_to_zarr.stac_utilities import get_netcdf_urls, get_output_catalog
-
 
 ZARR_MEDIA_TYPES = ['application/zarr', 'application/x-zarr']
 
@@ -48,10 +43,20 @@ class NetCDFToZarrAdapter(BaseHarmonyAdapter):
         """
         super().__init__(message, catalog=catalog, config=config)
 
-        if environ.get('USE_LOCALSTACK') == 'true':
-            self.s3 = make_localstack_s3fs()
-        else:
-            self.s3 = make_s3fs()
+    @cached_property
+    def s3(self):
+        """ The S3 file system used to write the output Zarr store. This is
+            only created when first needed, so that requests that fail
+            validation do not pay for the S3 session set-up. `s3fs` caches
+            file system instances created with the same arguments, so one
+            instance is shared by all adapters within a process.
+
+        """
+        # Deferred so that the NetCDF-4, Zarr and S3 stack are only loaded
+        # once an S3 connection is actually required.
+        from harmony_netcdf_to_zarr.convert import make_environment_s3fs
+
+        return make_environment_s3fs()
 
     def invoke(self):
         """ Downloads, translates to Zarr, then re-uploads granules. The
@@ -84,17 +89,28 @@ class NetCDFToZarrAdapter(BaseHarmonyAdapter):
             once per input granule. Because of this, each backend invocation is
             expected to produce a single Zarr output.
 
+            The conversion, rechunking, download and STAC modules pull in
+            NetCDF-4, Zarr, xarray and dask, so are only imported when a
+            request reaches this method.
+
         """
-        workdir = mkdtemp()
+        from harmony_netcdf_to_zarr.convert import mosaic_to_zarr
+        from harmony_netcdf_to_zarr.download_utilities import download_granules
+        from harmony_netcdf_to_zarr.process_utilities import get_process_count_limit
+        from harmony_netcdf_to_zarr.rechunk import rechunk_zarr
+        from harmony_netcdf_to_zarr.stac_utilities import (get_netcdf_urls,
+                                                           get_output_catalog)
+
+        # HARMONY_TMPDIR allows granules and intermediate Zarr stores to be
+        # written to a specific volume, e.g., a RAM-backed file system.
+        workdir = mkdtemp(dir=environ.get('HARMONY_TMPDIR'))
         try:
             items = list(self.get_all_catalog_items(self.catalog))
             netcdf_urls = get_netcdf_urls(items)
 
-            local_file_paths = download_granules(netcdf_urls, workdir,
-                                                 self.message.accessToken,
-                                                 self.config, self.logger)
-
-            if len(local_file_paths) == 1:
+            # The output location only depends on the input catalog, so is
+            # determined before any granules are downloaded.
+            if len(netcdf_urls) == 1:
                 output_name = generate_output_filename(netcdf_urls[0],
                                                        ext='.zarr')
             else:
@@ -103,18 +119,24 @@ class NetCDFToZarrAdapter(BaseHarmonyAdapter):
                 collection = self._get_item_source(items[0]).collection
                 output_name = f'{collection}_merged.zarr'
 
-            pre_rechunk_root = path_join(self.message.stagingLocation, f'{uuid4()}.zarr')
             zarr_root = path_join(self.message.stagingLocation, output_name)
 
-            zarr_store = self.s3.get_mapper(root=pre_rechunk_root,
-                                            check=False,
-                                            create=True)
+            # The pre-rechunk store is only an intermediate product, so it is
+            # written to local disk. Only the rechunked output goes to S3.
+            pre_rechunk_root = path_join(workdir, 'pre_rechunk.zarr')
+
+            process_count = get_process_count_limit()
+            local_file_paths = download_granules(netcdf_urls, workdir,
+                                                 self.message.accessToken,
+                                                 self.config, self.logger,
+                                                 process_count=process_count)
 
-            mosaic_to_zarr(local_file_paths, zarr_store, logger=self.logger)
+            mosaic_to_zarr(local_file_paths, pre_rechunk_root,
+                           process_count=process_count, logger=self.logger)
 
             rechunk_zarr(pre_rechunk_root, zarr_root, self)
 
-            return get_output_catalog(self.catalog, zarr_root)
+            return get_output_catalog(self.catalog, zarr_root, items)
         except Exception as service_exception:
             self.logger.error(service_exception, exc_info=1)
             raise ZarrException(
@@ -1,31 +1,56 @@
+from functools import lru_cache
 from logging import Logger
-from multiprocessing import Manager, Process, Queue
-from multiprocessing.managers import Namespace
+from math import ceil, prod
+from multiprocessing import Process, Queue, Value
+from multiprocessing.sharedctypes import Synchronized
 from os import cpu_count, environ
 from os.path import splitext
-from queue import Empty as QueueEmpty
-from re import findall
+from re import compile as compile_regex
 from time import time
-from typing import Any, List, Set, Tuple, Union, Dict, MutableMapping
+from typing import Any, List, Optional, Set, Tuple, Union, Dict, MutableMapping
 
 from fsspec.mapping import FSMap
 from netCDF4 import Dataset, Group as NetCDFGroup, Variable as NetCDFVariable
+from numcodecs import blosc
 from s3fs import S3FileSystem
 from zarr import (DirectoryStore, group as create_zarr_group,
                   Group as ZarrGroup, ProcessSynchronizer)
 from zarr.core import Array as ZarrArray
 from zarr.convenience import consolidate_metadata
+from zarr.util import json_dumps, json_loads
 import numpy as np
 
 from harmony_netcdf_to_zarr.mosaic_utilities import DimensionsMapping, resolve_reference_path
-from harmony_netcdf_to_zarr.process_utilities import monitor_processes
+from harmony_netcdf_to_zarr.process_utilities import (monitor_processes,
+                                                      ProcessErrorState)
 
 # Types for function signatures
 Number = Union[np.integer, np.floating, int, float]
 ZarrStore = Union[DirectoryStore, FSMap]
 
-# Some global variables that may be shared by different methods
-region = environ.get('AWS_DEFAULT_REGION') or 'us-west-2'
+# Connections kept open by the botocore client of each S3 file system. The
+# file system is shared by the threads that copy a store in rechunk.py, and by
+# the dask threads used by rechunker, which would otherwise exceed the botocore
+# default of 10 connections, discarding connections and repeating handshakes.
+S3_MAX_POOL_CONNECTIONS = 32
+
+# A compressed chunk size string, e.g., "10 Mi", with a binary prefix unit.
+CHUNKSIZE_PATTERN = compile_regex(r'^\s*([\d.]+)\s*(Ki|Mi|Gi)\s*$')
+
+# This dictionary converts from a string representation of units, such as
+# kibibytes, mebibytes or gibibytes, to a raw number of bytes. This is used
+# when a compressed chunk size is expressed as a string. See the NIST standard
+# for binary prefix: https://physics.nist.gov/cuu/Units/binary.html.
+BINARY_PREFIX_BYTES = {'Ki': 1 << 10, 'Mi': 1 << 20, 'Gi': 1 << 30}
+
+
+def get_region() -> str:
+    """ Retrieve the AWS region from the environment, defaulting to us-west-2.
+        This is read at call time, rather than on import, so that changes to
+        the environment, e.g., in tests, are respected.
+
+    """
+    return environ.get('AWS_DEFAULT_REGION') or 'us-west-2'
 
 
 def make_localstack_s3fs() -> S3FileSystem:
@@ -35,12 +60,26 @@ def make_localstack_s3fs() -> S3FileSystem:
         key='ACCESS_KEY',
         secret='SECRET_KEY',
         client_kwargs=dict(
-            region_name=region,
-            endpoint_url=f'http://{host}:4572'))
+            region_name=get_region(),
+            endpoint_url=f'http://{host}:4572'),
+        config_kwargs=dict(max_pool_connections=S3_MAX_POOL_CONNECTIONS))
 
 
 def make_s3fs() -> S3FileSystem:
-    return S3FileSystem(client_kwargs=dict(region_name=region))
+    return S3FileSystem(
+        client_kwargs=dict(region_name=get_region()),
+        config_kwargs=dict(max_pool_connections=S3_MAX_POOL_CONNECTIONS))
+
+
+def make_environment_s3fs() -> S3FileSystem:
+    """ Create the S3 file system for the current environment, using
+        localstack if the `USE_LOCALSTACK` environment variable is "true".
+
+    """
+    if environ.get('USE_LOCALSTACK') == 'true':
+        return make_localstack_s3fs()
+    else:
+        return make_s3fs()
 
 
 def mosaic_to_zarr(input_granules: List[str], zarr_store: Union[FSMap, str],
@@ -88,29 +127,37 @@ def mosaic_to_zarr(input_granules: List[str], zarr_store: Union[FSMap, str],
     else:
         process_count = min(process_count, cpu_count(), len(input_granules))
 
-    with Manager() as manager:
-        output_queue = manager.Queue(len(input_granules))
-        shared_namespace = manager.Namespace()
-        shared_namespace.granules_processed = 0
+    if isinstance(zarr_store, DirectoryStore):
+        store_type = 'DirectoryStore'
+        zarr_root = zarr_store.dir_path()
+    else:
+        store_type = 'S3FileSystem'
+        zarr_root = zarr_store.root
+
+    output_queue = Queue(len(input_granules) + process_count)
+    error_state = ProcessErrorState()
+    granules_processed = Value('i', 0)
 
-        if isinstance(zarr_store, DirectoryStore):
-            shared_namespace.store_type = 'DirectoryStore'
-            shared_namespace.zarr_root = zarr_store.dir_path()
-        else:
-            shared_namespace.store_type = 'S3FileSystem'
-            shared_namespace.zarr_root = zarr_store.root
+    for input_granule in input_granules:
+        output_queue.put(input_granule)
 
-        for input_granule in input_granules:
-            output_queue.put(input_granule)
+    # A sentinel for each worker, so that each stops after the last granule.
+    for _ in range(process_count):
+        output_queue.put(None)
 
-        processes = [Process(target=_output_worker,
-                             args=(output_queue, shared_namespace,
-                                   aggregated_dimensions, dim_mapping,
-                                   variable_chunk_metadata, logger))
-                     for _ in range(process_count)]
+    # If a worker fails, unread granules are left in the queue. They are not
+    # needed, so don't wait for them to be flushed when this process exits.
+    output_queue.cancel_join_thread()
 
-        monitor_processes(processes, shared_namespace,
-                          error_notice='Problem writing data to Zarr store')
+    processes = [Process(target=_output_worker,
+                         args=(output_queue, error_state, granules_processed,
+                               store_type, zarr_root, process_count,
+                               aggregated_dimensions, dim_mapping,
+                               variable_chunk_metadata, logger))
+                 for _ in range(process_count)]
+
+    monitor_processes(processes, error_state,
+                      error_notice='Problem writing data to Zarr store')
 
     _finalize_metadata(zarr_store)
     t2 = time()
@@ -126,54 +173,123 @@ def mosaic_to_zarr(input_granules: List[str], zarr_store: Union[FSMap, str],
 def _finalize_metadata(store: MutableMapping) -> None:
     """Safely prepare a store for consolidated metadata reading.
 
-    This function forces a "flush" of the input store before calling zarr's
-    consolidate_metadata function.  This ensures that whatever store handle is
-    passed to this routine has the most up to date information before
-    consolidation.
+    This function ensures that whatever store handle is passed to this routine
+    has the most up to date information before consolidating its metadata:
+
+    * An `FSMap`, e.g., for S3, has its cached directory listings invalidated,
+      as the worker processes have written to the store via other handles.
+    * Other stores, e.g., a `DirectoryStore`, read directly from their
+      backing storage, so need no preparation. The store is not written to,
+      so read-only or in-memory stores are not modified.
+
+    `FSMap` and `DirectoryStore` metadata are consolidated by walking the
+    group hierarchy, see `_consolidate_hierarchy_metadata`. Other stores use
+    zarr's consolidate_metadata function.
 
     """
-    store['.zforceflush'] = b'Temp file to force store sync.'
-    del store['.zforceflush']
-    consolidate_metadata(store)
+    if isinstance(store, FSMap):
+        store.fs.invalidate_cache(store.root)
 
+    if isinstance(store, (DirectoryStore, FSMap)):
+        _consolidate_hierarchy_metadata(store)
+    else:
+        consolidate_metadata(store)
+
+
+def _consolidate_hierarchy_metadata(store: ZarrStore) -> None:
+    """ Write consolidated metadata, in the same format as zarr's
+        consolidate_metadata function, to the `.zmetadata` key of the store.
+
+        zarr's consolidate_metadata function iterates through every key in
+        the store, including every chunk of every array, which for S3 means
+        listing the whole output. Instead, only group directories are listed
+        here, and the metadata keys of each child array are read directly, so
+        the number of requests scales with the number of groups and
+        variables, rather than with the number of chunks.
 
-def _output_worker(output_queue: Queue, shared_namespace: Namespace,
+    """
+    metadata = {}
+    group_paths = ['']
+
+    while len(group_paths) > 0:
+        group_path = group_paths.pop()
+        key_prefix = f'{group_path}/' if group_path else ''
+
+        for child_name in _list_store_directory(store, group_path):
+            child_key = f'{key_prefix}{child_name}'
+            if child_name in ('.zarray', '.zattrs', '.zgroup'):
+                metadata[child_key] = json_loads(store[child_key])
+            elif not child_name.startswith('.'):
+                try:
+                    metadata[f'{child_key}/.zarray'] = json_loads(
+                        store[f'{child_key}/.zarray']
+                    )
+                except KeyError:
+                    if f'{child_key}/.zgroup' in store:
+                        group_paths.append(child_key)
+                else:
+                    try:
+                        metadata[f'{child_key}/.zattrs'] = json_loads(
+                            store[f'{child_key}/.zattrs']
+                        )
+                    except KeyError:
+                        pass
+
+    store['.zmetadata'] = json_dumps({'zarr_consolidated_format': 1,
+                                      'metadata': metadata})
+
+
+def _list_store_directory(store: ZarrStore, path: str) -> List[str]:
+    """ Return the names of the immediate children of a path in a store,
+        without listing the contents of any child directory.
+
+    """
+    if isinstance(store, DirectoryStore):
+        return store.listdir(path)
+
+    directory = f'{store.root}/{path}' if path else store.root
+    return [child.rstrip('/').rsplit('/', 1)[-1]
+            for child in store.fs.ls(directory, detail=False)]
+
+
+def _output_worker(output_queue: Queue, error_state: ProcessErrorState,
+                   granules_processed: Synchronized, store_type: str,
+                   zarr_root: str, process_count: int,
                    aggregated_dimensions: Set[str], dim_mapping: DimensionsMapping,
                    variable_chunk_metadata: Dict = {}, logger: Logger = None) -> None:
-    """ This worker function is executed in a spawned process. It checks for
-        items in the main queue, which correspond to local file paths for input
-        NetCDF-4 files. If there is at least one URL left for writing, then the
-        groups, variables and attributes from that NetCDF-4 file are written to
-        the output Zarr store, in the related slice of the aggregated output
-        array.
+    """ This worker function is executed in a spawned process. It retrieves
+        items from the main queue, which correspond to local file paths for
+        input NetCDF-4 files. The groups, variables and attributes from each
+        NetCDF-4 file are written to the output Zarr store, in the related
+        slice of the aggregated output array. The worker stops when it
+        retrieves a `None` sentinel from the queue.
 
     """
-    if shared_namespace.store_type == 'S3FileSystem':
-        if environ.get('USE_LOCALSTACK') == 'true':
-            s3 = make_localstack_s3fs()
-        else:
-            s3 = make_s3fs()
-
-        zarr_store = s3.get_mapper(root=shared_namespace.zarr_root,
-                                   check=False, create=True)
+    if store_type == 'S3FileSystem':
+        s3 = make_environment_s3fs()
+        zarr_store = s3.get_mapper(root=zarr_root, check=False, create=False)
     else:
-        zarr_store = DirectoryStore(shared_namespace.zarr_root)
+        zarr_store = DirectoryStore(zarr_root)
 
-    zarr_synchronizer = ProcessSynchronizer(
-        f'{splitext(shared_namespace.zarr_root)[0]}.sync'
-    )
+    zarr_synchronizer = ProcessSynchronizer(f'{splitext(zarr_root)[0]}.sync')
 
-    while (not hasattr(shared_namespace, 'exception')
-           and not output_queue.empty()
-           and not hasattr(shared_namespace, 'process_error')):
-        try:
-            input_granule = output_queue.get_nowait()
-        except QueueEmpty:
+    # Each worker compresses its own chunks with Blosc, so the available CPUs
+    # are shared between workers, rather than each worker starting a Blosc
+    # thread per CPU.
+    blosc.set_nthreads(max(1, cpu_count() // process_count))
+
+    while not error_state.has_error:
+        input_granule = output_queue.get()
+
+        if input_granule is None:
             break
 
         try:
-            shared_namespace.granules_processed += 1
-            logger.info(f'processing granule {shared_namespace.granules_processed}')
+            with granules_processed.get_lock():
+                granules_processed.value += 1
+                granule_number = granules_processed.value
+
+            logger.info(f'processing granule {granule_number}')
             with Dataset(input_granule, 'r') as input_dataset:
                 input_dataset.set_auto_maskandscale(False)
                 __copy_group(input_dataset,
@@ -185,7 +301,7 @@ def _output_worker(output_queue: Queue, shared_namespace: Namespace,
             # If there was an issue, save a string message from the raised
             # exception. This will cause the other processes to stop processing
             # input NetCDF-4 files.
-            shared_namespace.exception = str(exception)
+            error_state.set_exception(exception)
             raise exception
 
 
@@ -255,7 +371,7 @@ def __copy_aggregated_dimension(variable_path: str, variable_data: np.ndarray,
     parent_group.require_dataset(variable_basename,
                                  data=variable_data,
                                  shape=variable_data.size,
-                                 chunks=tuple(chunks),
+                                 chunks=chunks,
                                  dtype=variable_data.dtype)
 
 
@@ -263,8 +379,8 @@ def __copy_group(netcdf_group: NetCDFGroup, zarr_group: ZarrGroup,
                  dim_mapping: DimensionsMapping,
                  aggregated_dimensions: Set[str] = set(),
                  variable_chunk_metadata: Dict = {}):
-    """ Recursively copies the source netCDF4 group into the destination Zarr
-        group, along with all sub-groups, variables, and attributes. The input
+    """ Copies the source netCDF4 group into the destination Zarr group,
+        along with all sub-groups, variables, and attributes. The input
         `zarr_group` has an associated `ProcessSynchronizer` object, which
         allows for writing data to the same object from within parallel
         processes. This object is automatically propagated to child groups and
@@ -286,27 +402,59 @@ def __copy_group(netcdf_group: NetCDFGroup, zarr_group: ZarrGroup,
             the output chunksizes
 
     """
-    __copy_attrs(netcdf_group, zarr_group)
+    # Groups are traversed with an explicit stack, rather than recursion.
+    groups_to_copy = [(netcdf_group, zarr_group)]
+
+    while groups_to_copy:
+        netcdf_group, zarr_group = groups_to_copy.pop()
+        __copy_attrs(netcdf_group, zarr_group)
+
+        for child_group_name, child_netcdf_group in netcdf_group.groups.items():
+            groups_to_copy.append((
+                child_netcdf_group,
+                zarr_group.require_group(child_group_name.split('/').pop())
+            ))
+
+        group_dimension_paths = __get_group_dimension_paths(netcdf_group)
 
-    for child_group_name, child_netcdf_group in netcdf_group.groups.items():
-        __copy_group(child_netcdf_group,
-                     zarr_group.require_group(child_group_name.split('/').pop()),
-                     dim_mapping, aggregated_dimensions, variable_chunk_metadata)
+        for variable_name, netcdf_variable in netcdf_group.variables.items():
+            __copy_variable(netcdf_variable, zarr_group, variable_name,
+                            dim_mapping, aggregated_dimensions,
+                            variable_chunk_metadata, group_dimension_paths)
 
-    for variable_name, netcdf_variable in netcdf_group.variables.items():
-        __copy_variable(netcdf_variable, zarr_group, variable_name,
-                        dim_mapping, aggregated_dimensions, variable_chunk_metadata)
+
+def __get_group_dimension_paths(netcdf_group: NetCDFGroup) -> Dict[str, str]:
+    """ Resolve the full path of every dimension referred to by variables in
+        the group. References are resolved relative to the group containing
+        the variable, so each dimension name only needs to be resolved once
+        for all variables in the same group.
+
+    """
+    group_dimension_paths = {}
+
+    for netcdf_variable in netcdf_group.variables.values():
+        for dimension in netcdf_variable.dimensions:
+            if dimension not in group_dimension_paths:
+                group_dimension_paths[dimension] = resolve_reference_path(
+                    netcdf_variable, dimension
+                )
+
+    return group_dimension_paths
 
 
 def __copy_variable(netcdf_variable: NetCDFVariable, zarr_group: ZarrGroup,
                     variable_name: str, dim_mapping: DimensionsMapping,
                     aggregated_dimensions: Set[str] = set(),
-                    variable_chunk_metadata: Dict = {}) -> None:
+                    variable_chunk_metadata: Dict = {},
+                    group_dimension_paths: Dict[str, str] = None) -> None:
     """ Copies the variable from the NetCDF variable into the Zarr group,
         giving it the provided variable_name. Note, the `Group.require_dataset`
         class method instantiates a dataset that uses the `ProcessSynchronizer`
         associated with the group, so that the dataset can be safely written to
-        from within multiple processes.
+        from within multiple processes. If the granule data cover whole output
+        chunks, no other process writes to those chunks, so the dataset is
+        instantiated without a synchronizer for the data, and only attribute
+        updates are locked.
 
         Parameters
         ----------
@@ -325,16 +473,23 @@ def __copy_variable(netcdf_variable: NetCDFVariable, zarr_group: ZarrGroup,
         variable_chunk_metadata: Dict
             A Dict of fully qualified variable names keys holding
             the output chunksizes
+        group_dimension_paths: Dict[str, str]
+            A Dict mapping dimension names used in the group containing the
+            variable to their full paths. This will be derived if not
+            supplied.
 
     """
     resolved_variable_name = resolve_reference_path(netcdf_variable,
                                                     variable_name)
-    # create zarr group/dataset
-    chunks = netcdf_variable.chunking()
-    if chunks == 'contiguous' or chunks is None:
-        chunks = netcdf_variable.shape
+    # Resolve dimension paths once, for both the shape and data slice.
+    if group_dimension_paths is None:
+        group_dimension_paths = __get_group_dimension_paths(netcdf_variable.group())
 
-    if not chunks and len(netcdf_variable.dimensions) == 0:
+    dimension_paths = [group_dimension_paths[dimension]
+                       for dimension in netcdf_variable.dimensions]
+
+    # create zarr group/dataset
+    if len(netcdf_variable.dimensions) == 0:
         # Treat a 0-dimensional NetCDF variable as a zarr group
         zarr_variable = zarr_group.require_group(variable_name)
     else:
@@ -342,25 +497,63 @@ def __copy_variable(netcdf_variable: NetCDFVariable, zarr_group: ZarrGroup,
         # Derive the aggregated shape, used for both the chunk size calculation
         # and as the shape of the output Zarr variable.
         aggregated_shape = __get_aggregated_shape(netcdf_variable, dim_mapping,
-                                                  aggregated_dimensions)
+                                                  aggregated_dimensions,
+                                                  dimension_paths)
 
         fill_value = getattr(netcdf_variable, '_FillValue', 0)
 
-        chunks = (variable_chunk_metadata.get(resolved_variable_name)
-                  or compute_chunksize(netcdf_variable.shape, netcdf_variable.dtype))
+        # Chunk shapes are usually computed from the first input granule.
+        # They are only computed here for variables absent from that granule.
+        chunks = variable_chunk_metadata.get(resolved_variable_name)
+        if chunks is None:
+            chunks = compute_chunksize(netcdf_variable.shape, netcdf_variable.dtype)
+
+        if resolved_variable_name in aggregated_dimensions:
+            dimension_indices = None
+        else:
+            dimension_indices = __get_dimension_indices(netcdf_variable,
+                                                        dim_mapping,
+                                                        dimension_paths)
+
+        # If the output region for this granule is chunk-aligned, no other
+        # granule writes to the same chunks, so the data can be written
+        # without acquiring a lock for each chunk.
+        if (
+            dimension_indices is not None
+            and __is_chunk_aligned(dimension_indices, aggregated_shape, chunks)
+        ):
+            synchronizer = None
+        else:
+            synchronizer = zarr_group.synchronizer
 
         zarr_variable = zarr_group.require_dataset(
             variable_name,
             shape=aggregated_shape,
-            chunks=tuple(chunks),
+            chunks=chunks,
             dtype=netcdf_variable.dtype,
-            fill_value=fill_value
+            fill_value=fill_value,
+            synchronizer=synchronizer
         )
 
-        if resolved_variable_name not in aggregated_dimensions:
+        if synchronizer is None and zarr_group.synchronizer is not None:
+            if __is_chunk_aligned(dimension_indices, zarr_variable.shape,
+                                  zarr_variable.chunks):
+                # Attribute updates rewrite the whole `.zattrs` object, so
+                # are still locked.
+                zarr_variable.attrs.synchronizer = zarr_group.synchronizer
+            else:
+                # Another granule created the array with different chunks,
+                # which this granule may share.
+                zarr_variable = zarr_group.require_dataset(
+                    variable_name, shape=aggregated_shape,
+                    dtype=netcdf_variable.dtype
+                )
+
+        if dimension_indices is not None:
             # For a non-aggregated dimension, insert input granule data
             __insert_data_slice(netcdf_variable, zarr_variable,
-                                resolved_variable_name, dim_mapping)
+                                resolved_variable_name, dim_mapping,
+                                dimension_paths, dimension_indices)
 
     # xarray requires the _ARRAY_DIMENSIONS metadata to know how to label axes
     kwarg_attributes = {'_ARRAY_DIMENSIONS': list(netcdf_variable.dimensions)}
@@ -385,7 +578,8 @@ def __copy_variable(netcdf_variable: NetCDFVariable, zarr_group: ZarrGroup,
 
 def __get_aggregated_shape(netcdf_variable: NetCDFVariable,
                            dim_mapping: DimensionsMapping,
-                           aggregated_dimensions) -> Tuple[int]:
+                           aggregated_dimensions,
+                           dimension_paths: List[str] = None) -> Tuple[int]:
     """ Derive the output array shape for a given input NetCDF-4 variable.
         There are several possible use-cases:
 
@@ -401,6 +595,9 @@ def __get_aggregated_shape(netcdf_variable: NetCDFVariable,
         * An input variable has no aggregated dimensions. The output variable
           shape should match in the input variable shape.
 
+        If the full paths of the variable dimensions have already been
+        resolved, they can be supplied via `dimension_paths`.
+
     """
     variable_path = resolve_reference_path(netcdf_variable,
                                            netcdf_variable.name)
@@ -412,35 +609,86 @@ def __get_aggregated_shape(netcdf_variable: NetCDFVariable,
         else:
             aggregated_shape = dim_mapping.output_dimensions[variable_path].values.shape
     else:
-        aggregated_shape = []
-        for dim_index, dim_name in enumerate(netcdf_variable.dimensions):
-            dimension_path = resolve_reference_path(netcdf_variable, dim_name)
+        if dimension_paths is None:
+            dimension_paths = [resolve_reference_path(netcdf_variable, dim_name)
+                               for dim_name in netcdf_variable.dimensions]
 
+        # `Variable.shape` queries the dimension sizes each time it is used.
+        aggregated_shape = []
+        for dimension_path, dimension_size in zip(dimension_paths,
+                                                  netcdf_variable.shape):
             if dimension_path in aggregated_dimensions:
                 aggregated_shape.append(
                     dim_mapping.output_dimensions[dimension_path].values.size
                 )
             else:
-                aggregated_shape.append(netcdf_variable.shape[dim_index])
+                aggregated_shape.append(dimension_size)
 
     return tuple(aggregated_shape)
 
 
 def __insert_data_slice(netcdf_variable: NetCDFVariable, zarr_variable: ZarrArray,
-                        variable_name: str, dim_mapping: DimensionsMapping):
+                        variable_name: str, dim_mapping: DimensionsMapping,
+                        dimension_paths: List[str] = None,
+                        dimension_indices: List[slice] = None):
     """ A helper function that identifies the index ranges in the aggregated
         output dimension into which the input values from the NetCDF-4
         variable should be inserted, and then updates the output Zarr store
-        with these data.
+        with these data, one chunk-aligned slab of the first dimension at a
+        time. If the full paths of the variable dimensions, or the output
+        index ranges, have already been resolved, they can be supplied via
+        `dimension_paths` and `dimension_indices`.
+
+    """
+    if dimension_indices is None:
+        dimension_indices = __get_dimension_indices(netcdf_variable,
+                                                    dim_mapping,
+                                                    dimension_paths)
+
+    # Copy the data in slabs along the first dimension, rather than reading
+    # the whole variable into memory at once. Each slab ends on an output
+    # chunk boundary, so no Zarr chunk is split between slabs from the same
+    # granule.
+    input_length = netcdf_variable.shape[0]
+    output_start = dimension_indices[0].start or 0
+    slab_size = zarr_variable.chunks[0]
+    input_start = 0
+    original_chunk_cache = __cache_source_chunk_row(netcdf_variable)
+
+    try:
+        while input_start < input_length:
+            output_index = output_start + input_start
+            input_end = min(input_length,
+                            input_start + slab_size - output_index % slab_size)
+            output_slab = slice(output_index, output_start + input_end)
+
+            zarr_variable[(output_slab, *dimension_indices[1:])] = (
+                netcdf_variable[input_start:input_end]
+            )
+            input_start = input_end
+    finally:
+        if original_chunk_cache is not None:
+            netcdf_variable.set_var_chunk_cache(*original_chunk_cache)
+
+
+def __get_dimension_indices(netcdf_variable: NetCDFVariable,
+                            dim_mapping: DimensionsMapping,
+                            dimension_paths: List[str] = None) -> List[slice]:
+    """ Identify the index ranges in the aggregated output dimensions into
+        which the input values from the NetCDF-4 variable should be inserted.
+        If the full paths of the variable dimensions have already been
+        resolved, they can be supplied via `dimension_paths`.
 
     """
     netcdf_file_path = netcdf_variable.group().filepath()
 
-    dimension_indices = []
+    if dimension_paths is None:
+        dimension_paths = [resolve_reference_path(netcdf_variable, dimension)
+                           for dimension in netcdf_variable.dimensions]
 
-    for dimension in netcdf_variable.dimensions:
-        dimension_path = resolve_reference_path(netcdf_variable, dimension)
+    dimension_indices = []
 
+    for dimension_path in dimension_paths:
         if (
                 dimension_path in dim_mapping.output_dimensions
                 and dim_mapping.output_dimensions[dimension_path].is_temporal()
@@ -449,23 +697,92 @@ def __insert_data_slice(netcdf_variable: NetCDFVariable, zarr_variable: ZarrArra
             input_dimension = (dim_mapping.input_dimensions[dimension_path]
                                                            [netcdf_file_path])
             input_values = input_dimension.get_values(output_dimension.units)
-            output_indices = np.where(np.in1d(output_dimension.values,
-                                              input_values))[0]
 
             # This assumes that all input grid values from a single granule
-            # represent a continuous segment of the output dimension. Also,
-            # `slice(m, n)` will address from element `m`, up to (but not
-            # including) `n`, so need to extend the upper end of the slice by 1
-            # to include all input data.
-            dimension_indices.append(slice(output_indices.min(),
-                                           output_indices.max() + 1))
+            # represent a continuous segment of the output dimension. Output
+            # temporal values are sorted (see `np.unique` in
+            # `DimensionsMapping`), so the ends of the segment can be found
+            # with a binary search. Searching from the right for the maximum
+            # input value gives the exclusive upper end of the slice.
+            start_index = np.searchsorted(output_dimension.values,
+                                          input_values.min(), side='left')
+            end_index = np.searchsorted(output_dimension.values,
+                                        input_values.max(), side='right')
+            dimension_indices.append(slice(int(start_index), int(end_index)))
         else:
             # Currently only supporting temporal aggregation. Other dimensions,
             # such as spatial dimensions, are assumed to be identical in all
             # input granules.
             dimension_indices.append(slice(None))
 
-    zarr_variable[tuple(dimension_indices)] = netcdf_variable[:]
+    return dimension_indices
+
+
+def __is_chunk_aligned(dimension_indices: List[slice], shape: Tuple[int],
+                       chunks: Tuple[int]) -> bool:
+    """ Check whether an output region starts and ends on chunk boundaries
+        in every dimension, or at the end of the array. Data written to such
+        a region covers whole chunks, so can only conflict with writes from
+        other granules if those granules share the same aggregated values.
+
+        Variables without aggregated dimensions are written in full by every
+        granule, with identical data, so are always considered aligned.
+
+    """
+    for dimension_slice, dimension_size, chunk_size in zip(
+            dimension_indices, shape, chunks
+    ):
+        start = dimension_slice.start or 0
+        stop = (dimension_size if dimension_slice.stop is None
+                else dimension_slice.stop)
+
+        if start % chunk_size != 0 or (stop % chunk_size != 0
+                                       and stop != dimension_size):
+            return False
+
+    return True
+
+
+def __cache_source_chunk_row(
+    netcdf_variable: NetCDFVariable
+) -> Optional[Tuple[int, int, float]]:
+    """ Slabs copied by `__insert_data_slice` are aligned to the output Zarr
+        chunks, which may not be aligned to the on-disk NetCDF-4 chunks along
+        the first dimension. An on-disk chunk spanning two slabs would be read
+        and decompressed twice if it has been evicted from the HDF5 chunk
+        cache. To avoid this, the chunk cache of the variable is enlarged, if
+        needed, to hold one full row of on-disk chunks along the first
+        dimension.
+
+        If the cache is changed, the original cache settings are returned, so
+        they can be restored after the variable is copied.
+
+    """
+    source_chunks = netcdf_variable.chunking()
+
+    if (
+            not isinstance(source_chunks, list)
+            or not isinstance(netcdf_variable.dtype, np.dtype)
+    ):
+        # Contiguous variables, and variable length types, are not cached.
+        return None
+
+    row_chunks = prod(ceil(dimension_size / chunk_size)
+                      for dimension_size, chunk_size
+                      in zip(netcdf_variable.shape[1:], source_chunks[1:]))
+    row_bytes = (row_chunks * prod(source_chunks)
+                 * netcdf_variable.dtype.itemsize)
+
+    cache_size, cache_elements, preemption = netcdf_variable.get_var_chunk_cache()
+
+    if row_bytes <= cache_size and row_chunks <= cache_elements:
+        return None
+
+    netcdf_variable.set_var_chunk_cache(size=max(row_bytes, cache_size),
+                                        nelems=max(row_chunks, cache_elements),
+                                        preemption=preemption)
+
+    return cache_size, cache_elements, preemption
 
 
 def __copy_attrs(netcdf_input: Union[NetCDFVariable, NetCDFGroup],
@@ -489,13 +806,17 @@ def __copy_attrs(netcdf_input: Union[NetCDFVariable, NetCDFGroup],
 
     """
     existing_attributes = set(zarr_output.attrs.keys())
-    new_attributes = {key: __netcdf_attr_to_python(getattr(netcdf_input, key))
-                      for key in netcdf_input.ncattrs()}
 
-    new_attributes.update(kwargs)
+    # Attributes already in the Zarr store are skipped before being read, as
+    # each read is a separate call into the netCDF-C library.
+    new_attributes = {
+        key: __netcdf_attr_to_python(netcdf_input.getncattr(key))
+        for key in netcdf_input.ncattrs()
+        if key not in existing_attributes
+    }
 
-    for existing_attribute in existing_attributes:
-        new_attributes.pop(existing_attribute, None)
+    new_attributes.update({key: value for key, value in kwargs.items()
+                           if key not in existing_attributes})
 
     zarr_output.attrs.update(new_attributes)
 
@@ -517,23 +838,59 @@ def __netcdf_attr_to_python(val: Any) -> Any:
     any
         The converted value
     """
-    if isinstance(val, np.integer):
+    converter = ATTRIBUTE_CONVERTERS.get(type(val))
+
+    if converter is not None:
+        return converter(val)
+    elif isinstance(val, str):
+        # Most attributes are strings, which need no conversion.
+        return val
+    elif isinstance(val, np.integer):
         return int(val)
     elif isinstance(val, np.floating):
         return float(val)
     elif isinstance(val, np.ndarray):
-        return [__netcdf_attr_to_python(v) for v in val.tolist()]
+        return _netcdf_array_to_python(val)
     elif isinstance(val, bytes):
-        # Assumes bytes are UTF-8 strings.  This holds for attributes.
-        return val.decode('utf-8')
+        return _decode_attr_bytes(val)
     else:
         return val
 
 
+def _netcdf_array_to_python(val: np.ndarray) -> List:
+    """ Convert an array attribute value to a list of Python primitives. """
+    if val.dtype.kind in ('O', 'S'):
+        # Elements may need conversion, e.g., bytes to strings.
+        return [__netcdf_attr_to_python(v) for v in val.tolist()]
+
+    # `tolist` already returns Python primitive types for other arrays.
+    return val.tolist()
+
+
+def _decode_attr_bytes(val: bytes) -> str:
+    """ Assumes bytes are UTF-8 strings.  This holds for attributes. """
+    return val.decode('utf-8')
+
+
+# Converters for the exact types of attribute values read by netCDF4. Looking
+# up the type of a value is quicker than a series of `isinstance` checks.
+# Subclasses, and types not listed here, fall back to those checks in
+# `__netcdf_attr_to_python`.
+ATTRIBUTE_CONVERTERS = {
+    **{integer_type: int for integer_type in (np.int8, np.int16, np.int32,
+                                              np.int64, np.uint8, np.uint16,
+                                              np.uint32, np.uint64)},
+    **{float_type: float for float_type in (np.float16, np.float32,
+                                            np.float64)},
+    bytes: _decode_attr_bytes,
+    np.ndarray: _netcdf_array_to_python,
+}
+
+
 def compute_chunksize(shape: Union[tuple, list],
                       datatype: str,
                       compression_ratio: float = 1.5,
-                      compressed_chunksize_byte: Union[int, str] = '10 Mi'):
+                      compressed_chunksize_byte: Union[int, str] = '10 Mi') -> Tuple[int]:
     """
     Compute the chunksize for a given shape and datatype
         based on the compression requirement
@@ -561,30 +918,49 @@ def compute_chunksize(shape: Union[tuple, list],
 
     Returns
     -------
-    list/tuple
+    tuple of int
         the regenerated new zarr chunks
     """
+    # Many variables share the same shape and data type, so the calculation
+    # is cached on hashable versions of the arguments.
+    return _compute_chunksize_cached(
+        tuple(int(size) for size in shape), np.dtype(datatype).str,
+        compression_ratio, _chunksize_bytes(compressed_chunksize_byte)
+    )
+
+
+@lru_cache(maxsize=None)
+def _chunksize_bytes(compressed_chunksize_byte: Union[int, str]) -> int:
+    """ Convert the expected compressed chunk size to an integer number of
+        bytes. If it's a string, assuming it follows NIST standard for binary
+        prefix, except that only Ki, Mi, and Gi are allowed.
+
+    """
     # convert compressed_chunksize_byte to integer if it's a str
     if isinstance(compressed_chunksize_byte, str):
         try:
-            (value, unit) = findall(
-                r'^\s*([\d.]+)\s*(Ki|Mi|Gi)\s*$', compressed_chunksize_byte
-            )[0]
-        except IndexError:
+            (value, unit) = CHUNKSIZE_PATTERN.match(compressed_chunksize_byte).groups()
+        except AttributeError:
             raise ValueError('Chunksize needs to be either an integer or '
                              'string. If it\'s a string, assuming it follows '
                              'NIST standard for binary prefix '
                              '(https://physics.nist.gov/cuu/Units/binary.html)'
                              ' except that only Ki, Mi, and Gi are allowed.')
 
-        # This dictionary converts from a string representation of units, such as
-        # kibibytes, mebibytes or gibibytes, to a raw number of bytes. This is used
-        # when a compressed chunk size is expressed as a string. See the NIST standard
-        # for binary prefix: https://physics.nist.gov/cuu/Units/binary.html.
-        binary_prefix_conversion_map = {'Ki': 1024, 'Mi': 1048576, 'Gi': 1073741824}
+        compressed_chunksize_byte = int(float(value)) * BINARY_PREFIX_BYTES[unit]
 
-        compressed_chunksize_byte = int(float(value)) * int(binary_prefix_conversion_map[unit])
+    return compressed_chunksize_byte
 
+
+@lru_cache(maxsize=None)
+def _compute_chunksize_cached(shape: Tuple[int], datatype: str,
+                              compression_ratio: float,
+                              compressed_chunksize_byte: int) -> Tuple[int]:
+    """ Compute the chunksize for a given shape and datatype, see
+        `compute_chunksize`. All arguments must be hashable, so that results
+        can be cached.
+
+    """
     # get product of chunksize along different dimensions before compression
     if compression_ratio < 1.:
         raise ValueError('Compression ratio < 1 found when estimating chunk size.')
@@ -593,24 +969,31 @@ def compute_chunksize(shape: Union[tuple, list],
     )
 
     # compute the chunksize by trying to make it equal along different dimensions,
-    #    without exceeding the given shape boundary
-    suggested_chunksize = np.full(len(shape), 0)
-    shape_array = np.array(shape)
-    dim_to_process = np.full(len(shape), True)
-    while not (~dim_to_process).all():
-        chunksize_remaining = chunksize_unrolled // suggested_chunksize[~dim_to_process].prod()
-        chunksize_oneside = int(pow(chunksize_remaining, 1 / dim_to_process.sum()))
-        if (shape_array[dim_to_process] >= chunksize_oneside).all():
-            suggested_chunksize[dim_to_process] = chunksize_oneside
-            dim_to_process[:] = False
-        else:
-            dim_to_fill = dim_to_process & (shape_array < chunksize_oneside)
-            suggested_chunksize[dim_to_fill] = shape_array[dim_to_fill]
-            dim_to_process[dim_to_fill] = False
-
-    # return new chunks
-    suggested_chunksize = type(shape)(suggested_chunksize.tolist())
-    return suggested_chunksize
+    #    without exceeding the given shape boundary. Dimensions are visited in
+    #    ascending size order, so those smaller than the equal share form a
+    #    prefix: they are filled with their full size, in batches, before the
+    #    share is recomputed for the remaining dimensions.
+    suggested_chunksize = [0] * len(shape)
+    dims_by_size = sorted(range(len(shape)), key=shape.__getitem__)
+    # Product of the chunksize along dimensions that have been filled.
+    filled_chunksize = 1
+    chunksize_oneside = None
+    for index, dim in enumerate(dims_by_size):
+        if chunksize_oneside is None or shape[dim] >= chunksize_oneside:
+            # A zero-length dimension leaves no room along other dimensions.
+            chunksize_remaining = (chunksize_unrolled // filled_chunksize
+                                   if filled_chunksize else 0)
+            chunksize_oneside = int(pow(chunksize_remaining,
+                                        1 / (len(shape) - index)))
+            if shape[dim] >= chunksize_oneside:
+                for unfilled_dim in dims_by_size[index:]:
+                    suggested_chunksize[unfilled_dim] = chunksize_oneside
+                break
+
+        suggested_chunksize[dim] = shape[dim]
+        filled_chunksize *= shape[dim]
+
+    return tuple(suggested_chunksize)
 
 
 def granule_chunk_shapes(granule_filename: str) -> Dict:
@@ -625,14 +1008,22 @@ def granule_chunk_shapes(granule_filename: str) -> Dict:
         return _chunk_shapes(dataset)
 
 
-def _chunk_shapes(group: Union[Dataset, NetCDFGroup], results: Dict = {}) -> Dict:
-    """Recursively return chunk shapes for all variables from group."""
+def _chunk_shapes(group: Union[Dataset, NetCDFGroup], results: Dict = None) -> Dict:
+    """Recursively return chunk shapes for all variables from group.
+
+    A new dictionary is created for each top-level call, so that results from
+    one granule are not retained in the next.
+
+    """
+    if results is None:
+        results = {}
+
     for netcdf4_variable in group.variables.values():
         variable_path = '/'.join([group.path, netcdf4_variable.name])
         variable_path = f'/{variable_path.lstrip("/")}'
         results[variable_path] = compute_chunksize(netcdf4_variable.shape, netcdf4_variable.dtype)
 
     for child_group in group.groups.values():
-        results.update(_chunk_shapes(child_group, results))
+        _chunk_shapes(child_group, results)
 
     return results
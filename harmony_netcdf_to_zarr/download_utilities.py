@@ -4,17 +4,21 @@
     https://github.com/podaac/concise/blob/develop/podaac/merger/harmony/download_worker.py
 
 """
-from copy import deepcopy
 from logging import Logger
-from multiprocessing import Manager, Process, Queue
-from multiprocessing.managers import Namespace
+from multiprocessing import Process, Queue
 from os import cpu_count
-from queue import Empty as QueueEmpty
+from queue import Empty
 from typing import List
 
 from harmony.util import Config, download
 
-from harmony_netcdf_to_zarr.process_utilities import monitor_processes
+from harmony_netcdf_to_zarr.process_utilities import (monitor_processes,
+                                                      ProcessErrorState)
+
+
+# Downloads spend most of their time waiting on the network, rather than using
+# a CPU, so more downloads than CPUs can be run at the same time.
+DOWNLOAD_PROCESSES_PER_CPU = 2
 
 
 def download_granules(netcdf_urls: List[str], destination_directory: str,
@@ -26,61 +30,74 @@ def download_granules(netcdf_urls: List[str], destination_directory: str,
 
         The number of processes is limited to the minimum of:
 
-        * The number of available CPUs.
+        * `DOWNLOAD_PROCESSES_PER_CPU` times the number of available CPUs.
         * The number of requested NetCDF-4 files.
         * An user-supplied number of processes (if specified).
 
+        Downloads are bound by network I/O, so a user-supplied number of
+        processes is not additionally limited by the number of CPUs.
+
     """
     logger.info('Beginning granule downloads.')
 
     if process_count is None:
-        process_count = min(cpu_count(), len(netcdf_urls))
+        process_count = min(cpu_count() * DOWNLOAD_PROCESSES_PER_CPU,
+                            len(netcdf_urls))
     else:
-        process_count = min(process_count, cpu_count(), netcdf_urls)
-
-    with Manager() as manager:
-        download_queue = manager.Queue(len(netcdf_urls))
-        shared_namespace = manager.Namespace()
-        local_paths = manager.list()
-
-        for netcdf_url in netcdf_urls:
-            download_queue.put(netcdf_url)
-
-        # Spawn a worker process for each CPU being used
-        processes = [Process(target=_download_worker,
-                             args=(download_queue, shared_namespace,
-                                   local_paths, destination_directory,
-                                   access_token, harmony_config, logger))
-                     for _ in range(process_count)]
-
-        monitor_processes(processes, shared_namespace, error_notice='Download failed')
-
-        # Copy paths so they persist outside of the Manager context.
-        download_paths = deepcopy(local_paths)
+        process_count = min(process_count, len(netcdf_urls))
+
+    download_queue = Queue(len(netcdf_urls) + process_count)
+    results_queue = Queue()
+    error_state = ProcessErrorState()
+    download_paths = []
+
+    for netcdf_url in netcdf_urls:
+        download_queue.put(netcdf_url)
+
+    # A sentinel for each worker, so that each stops after the last URL.
+    for _ in range(process_count):
+        download_queue.put(None)
+
+    # If a worker fails, unread URLs are left in the queue. They are not
+    # needed, so don't wait for them to be flushed when this process exits.
+    download_queue.cancel_join_thread()
+
+    # Spawn a worker process for each CPU being used
+    processes = [Process(target=_download_worker,
+                         args=(download_queue, error_state, results_queue,
+                               destination_directory, access_token,
+                               harmony_config, logger))
+                 for _ in range(process_count)]
+
+    # Local paths are read while the workers run, as a worker cannot exit
+    # until the paths it has put in the results queue have been read.
+    monitor_processes(
+        processes, error_state, error_notice='Download failed',
+        poll_callback=lambda: _get_queued_items(results_queue, download_paths)
+    )
+    _get_queued_items(results_queue, download_paths)
 
     logger.info('Finished downloading granules')
 
     return download_paths
 
 
-def _download_worker(download_queue: Queue, shared_namespace: Namespace,
-                     local_paths: List, destination_dir: str,
+def _download_worker(download_queue: Queue, error_state: ProcessErrorState,
+                     results_queue: Queue, destination_dir: str,
                      access_token: str, harmony_config: Config, logger: Logger):
-    """ A method to be executed in a separate process. This will check for
-        items in the queue, which correspond to URLs for NetCDF-4 files to
-        download. If there is at least one URL left for download, then it is
-        retrieved from the queue and the `harmony-py.util.download` function
-        is used to retrieve the granule. Otherwise, the process is ended. All
-        local paths of downloaded granules are added to a list that is
-        administered by the process manager instance.
+    """ A method to be executed in a separate process. This will retrieve
+        items from the queue, which correspond to URLs for NetCDF-4 files to
+        download. The `harmony-py.util.download` function is used to retrieve
+        each granule, until a `None` sentinel is retrieved from the queue,
+        at which point the process is ended. All local paths of downloaded
+        granules are put in the results queue, which is read by the parent
+        process.
 
     """
-    while (not hasattr(shared_namespace, 'exception')
-           and not hasattr(shared_namespace, 'process_error')
-           and not download_queue.empty()):
-        try:
-            netcdf_url = download_queue.get_nowait()
-        except QueueEmpty:
+    while not error_state.has_error:
+        netcdf_url = download_queue.get()
+
+        if netcdf_url is None:
             break
 
         try:
@@ -88,9 +105,21 @@ def _download_worker(download_queue: Queue, shared_namespace: Namespace,
                                   access_token=access_token,
                                   cfg=harmony_config)
 
-            local_paths.append(local_path)
+            results_queue.put(local_path)
         except Exception as exception:
             # If there was an issue, save a string message from the raised
             # exception. This will cause other processes to stop downloads.
-            shared_namespace.exception = str(exception)
+            error_state.set_exception(exception)
             raise exception
+
+
+def _get_queued_items(queue: Queue, items: List) -> None:
+    """ Append all items that can currently be read from a queue to a list,
+        without waiting for further items.
+
+    """
+    while True:
+        try:
+            items.append(queue.get_nowait())
+        except Empty:
+            break
@@ -2,8 +2,9 @@
     create aggregated dimensions, allowing for a single Zarr output.
 
 """
-from datetime import timedelta
-from typing import Dict, List, Optional, Tuple, Union
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple, Union
 
 from cftime import date2num, num2date
 from dateutil.parser import parse as parse_datetime
@@ -26,6 +27,11 @@ time_delta_to_unit_map = {seconds_delta: 'seconds',
                           hours_delta: 'hours',
                           days_delta: 'days'}
 
+# The first date of the Gregorian calendar. `cftime` uses the Julian calendar
+# for earlier dates by default, so differences between earlier epochs are not
+# the same as those calculated by `datetime`.
+GREGORIAN_START = datetime(1582, 10, 15)
+
 time_unit_to_delta_map = {'seconds': seconds_delta,
                           'second': seconds_delta,
                           'secs': seconds_delta,
@@ -81,10 +87,8 @@ class DimensionInformation:
             https://cfconventions.org/cf-conventions/cf-conventions.html#time-coordinate
 
         """
-        if self.units is not None and ' since ' in self.units:
-            time_unit_string, epoch_string = self.units.split(' since ')
-            self.epoch = parse_datetime(epoch_string)
-            self.time_unit = time_unit_to_delta_map.get(time_unit_string)
+        if self.units is not None:
+            self.epoch, self.time_unit = parse_temporal_units(self.units)
 
     def is_temporal(self):
         """ Return whether the instance could extract all required information from
@@ -102,12 +106,57 @@ class DimensionInformation:
 
         """
         if self.is_temporal() and output_units is not None:
-            values = date2num(num2date(self.values, self.units), output_units)
+            values = self._get_values_with_epoch_offset(output_units)
+
+            if values is None:
+                values = date2num(num2date(self.values, self.units),
+                                  output_units)
         else:
             values = self.values
 
         return values
 
+    def _get_values_with_epoch_offset(self, output_units: str) -> Optional[np.ndarray]:
+        """ Convert temporal values to the epoch in the output units by adding
+            a constant offset, rather than converting every value to a date
+            and back with `cftime`.
+
+            This is only done when the result is exactly what `cftime` would
+            return: the output units use the same time unit, the difference
+            between the epochs is a whole number of those units, neither
+            epoch precedes the Gregorian calendar and all values are unmasked
+            integers. `cftime` returns 64-bit integers in this case. Otherwise
+            `None` is returned, and the values are converted with `cftime`.
+
+        """
+        output_epoch, output_time_unit = parse_temporal_units(output_units)
+
+        if (
+            output_time_unit != self.time_unit
+            or output_epoch is None
+            or min(self.epoch.replace(tzinfo=None),
+                   output_epoch.replace(tzinfo=None)) < GREGORIAN_START
+            or np.ma.is_masked(self.values)
+        ):
+            return None
+
+        try:
+            epoch_offset = self.epoch - output_epoch
+        except TypeError:
+            # An epoch with a time zone cannot be compared to one without.
+            return None
+
+        values = np.ma.getdata(self.values)
+
+        if (
+            epoch_offset % self.time_unit
+            or not (np.issubdtype(values.dtype, np.integer)
+                    or np.all(np.mod(values, 1) == 0))
+        ):
+            return None
+
+        return values.astype(np.int64) + epoch_offset // self.time_unit
+
 
 class NetCDF4DimensionInformation(DimensionInformation):
     """ A subclass of the `DimensionInformation` class that takes a NetCDF-4
@@ -172,36 +221,55 @@ class DimensionsMapping:
         """
         for input_path in self.input_paths:
             with Dataset(input_path, 'r') as input_dataset:
-                self._parse_group(input_dataset, input_dataset)
+                self._parse_group(input_dataset, input_dataset,
+                                  input_dataset.filepath(), set())
 
-    def _parse_group(self, group: Union[Dataset, Group], dataset: Dataset):
+    def _parse_group(self, group: Union[Dataset, Group], dataset: Dataset,
+                     dataset_path: str, parsed_dimension_paths: Set[str]):
         """ Iterate through group variables extracting each. Then recursively
             call this function to parse any subgroups.
 
+            A dimension reference resolves to the same path for all variables
+            in a group, so each is only resolved once per group. Dimension
+            paths that have already been parsed for the file are recorded in
+            `parsed_dimension_paths`, so each dimension is only checked once,
+            however many variables refer to it.
+
         """
+        group_dimension_paths = {}
+
         for variable in group.variables.values():
-            self._parse_variable_dimensions(variable, dataset)
+            for dimension_name in variable.dimensions:
+                dimension_path = group_dimension_paths.get(dimension_name)
+
+                if dimension_path is None:
+                    dimension_path = resolve_reference_path(variable,
+                                                            dimension_name)
+                    group_dimension_paths[dimension_name] = dimension_path
+
+                if dimension_path not in parsed_dimension_paths:
+                    parsed_dimension_paths.add(dimension_path)
+                    self._parse_dimension(dimension_path, dataset,
+                                          dataset_path)
 
         for nested_group in group.groups.values():
-            self._parse_group(nested_group, dataset)
+            self._parse_group(nested_group, dataset, dataset_path,
+                              parsed_dimension_paths)
 
-    def _parse_variable_dimensions(self, variable: Variable, dataset: Dataset):
-        """ Extract the dimensions associated with a given variable.
+    def _parse_dimension(self, dimension_path: str, dataset: Dataset,
+                         dataset_path: str):
+        """ Extract the information for a dimension referred to by a variable.
             This function will only save those dimensions that have associated
             variables also within the input NetCDF-4 file.
 
         """
-        for dimension_name in variable.dimensions:
-            dimension_path = resolve_reference_path(variable, dimension_name)
-            input_path = dataset.filepath()
-
-            if is_variable_in_dataset(dimension_path, dataset):
-                dim_data = self.input_dimensions.setdefault(dimension_path, {})
+        if is_variable_in_dataset(dimension_path, dataset):
+            dim_data = self.input_dimensions.setdefault(dimension_path, {})
 
-                if input_path not in dim_data:
-                    dim_data[input_path] = NetCDF4DimensionInformation(
-                        dataset, dimension_path
-                    )
+            if dataset_path not in dim_data:
+                dim_data[dataset_path] = NetCDF4DimensionInformation(
+                    dataset, dimension_path
+                )
 
     def _aggregate_output_dimensions(self):
         """ Iterate through each input dimension listed in
@@ -281,18 +349,16 @@ class DimensionsMapping:
             ```
 
         """
-        dimension_units = [dimension_input.units
-                           for dimension_input in dimension_inputs.values()]
-        dimension_epochs = [dimension_input.epoch
-                            for dimension_input in dimension_inputs.values()]
-
-        output_dimension_units = dimension_units[np.argmin(dimension_epochs)]
+        earliest_input = min(dimension_inputs.values(),
+                             key=lambda dimension_input: dimension_input.epoch)
+        output_dimension_units = earliest_input.units
+        first_input = next(iter(dimension_inputs.values()))
 
         all_input_values = np.unique(
             np.concatenate(
                 [dimension_input.get_values(output_dimension_units)
                  for dimension_input in dimension_inputs.values()],
-                dtype=list(dimension_inputs.values())[0].get_values().dtype
+                dtype=first_input.values.dtype
             )
         )
         bounds_path, bounds_values = self._get_dimension_bounds(
@@ -308,7 +374,8 @@ class DimensionsMapping:
         """ Use `get_resolution` to determine the greatest common divisor of
             all dimension input values. Calculate the output dimension values
             using this resolution, the minimum value of the input dimensions
-            and maximum value of the input dimensions.
+            and maximum value of the input dimensions. The input values are
+            only scaled to integers once, for both of these steps.
 
             Next  use the `_get_dimension_bounds` class method to check if the
             input dimensions have an associated bounds variable, if so derive
@@ -319,9 +386,11 @@ class DimensionsMapping:
             that extends to include all input dimension values.
 
         """
-        grid_resolution = get_resolution(input_dimension_values)
+        scaled_values, scale_factor = scale_to_integers(input_dimension_values)
+        grid_resolution = get_scaled_resolution(scaled_values, scale_factor)
         output_dimension_values = get_grid_values(input_dimension_values,
-                                                  grid_resolution)
+                                                  grid_resolution,
+                                                  scale_factor)
 
         bounds_path, bounds_values = self._get_dimension_bounds(
             dimension_name, output_dimension_values
@@ -355,45 +424,39 @@ class DimensionsMapping:
         if bounds_path is not None:
             bounds_values = np.zeros((output_dimension_values.size, 2),
                                      dtype=output_dimension_values.dtype)
-            filled_indices = set()
+            filled_mask = np.zeros(output_dimension_values.size, dtype=bool)
 
             for input_dimension in self.input_dimensions[dimension_name].values():
                 # For each granule, match the dimension values to the output
                 # dimension values. Place the bounds values from the input
                 # granules in the corresponding places in the output bounds
-                # 2-D array. Also accumulate indices where bounds are applied,
-                # so that any missing bounds data can be identified.
-                input_indices = np.where(np.in1d(output_dimension_values,
-                                                 input_dimension.values))[0]
+                # 2-D array. Also flag indices where bounds are applied, so
+                # that any missing bounds data can be identified.
+                input_indices = get_matching_indices(output_dimension_values,
+                                                     input_dimension.values)
 
                 bounds_values[input_indices, :] = input_dimension.bounds_values[:]
-                filled_indices.update(input_indices)
+                filled_mask[input_indices] = True
 
-            if len(filled_indices) != output_dimension_values.size:
+            if not filled_mask.all():
                 # The output bounds array has not been entirely filled
-                all_indices = set(range(output_dimension_values.size))
-                unfilled_indices = np.array(list(all_indices - filled_indices))
-                filled_indices = np.array(list(filled_indices))
+                unfilled_indices = np.flatnonzero(~filled_mask)
+                filled_indices = np.flatnonzero(filled_mask)
 
                 # Find median differences between the input dimension values
-                # and the upper and lower bounds where the bounds are filled
-                median_lower = np.median(
-                    np.subtract(output_dimension_values,
-                                bounds_values.T[0])[filled_indices]
-                )
-                median_upper = np.median(
-                    np.subtract(bounds_values.T[1],
-                                output_dimension_values)[filled_indices]
-                )
+                # and the upper and lower bounds where the bounds are filled.
+                # Only the filled points are gathered, rather than finding
+                # differences for the full output dimension.
+                filled_values = output_dimension_values[filled_indices]
+                filled_bounds = bounds_values[filled_indices]
+                median_lower = np.median(filled_values - filled_bounds[:, 0])
+                median_upper = np.median(filled_bounds[:, 1] - filled_values)
 
                 # Apply the median differences to each point with missing
                 # bounds data to fill the rest of the bounds array.
-                bounds_values[unfilled_indices, 0] = np.subtract(
-                    output_dimension_values[unfilled_indices], median_lower
-                )
-                bounds_values[unfilled_indices, 1] = np.add(
-                    output_dimension_values[unfilled_indices], median_upper
-                )
+                unfilled_values = output_dimension_values[unfilled_indices]
+                bounds_values[unfilled_indices, 0] = unfilled_values - median_lower
+                bounds_values[unfilled_indices, 1] = unfilled_values + median_upper
 
             # Remove any recurring decimal places:
             _, scale_factor = scale_to_integers(output_dimension_values)
@@ -414,6 +477,40 @@ class DimensionsMapping:
             self.output_bounds[dimension.bounds_path] = dimension.dimension_path
 
 
+@lru_cache(maxsize=1024)
+def parse_temporal_units(
+    units: str
+) -> Tuple[Optional[datetime], Optional[timedelta]]:
+    """ Extract the epoch and time unit from a `units` metadata attribute, if
+        it follows the CF-Convention format for a temporal dimension (e.g.,
+        "seconds since 2000-01-02T03:04:05"). Otherwise, or if the time unit
+        is not recognised, `None` is returned for the missing information.
+        Granules in a request usually share their units, so results are
+        cached.
+
+    """
+    if ' since ' not in units:
+        return None, None
+
+    time_unit_string, epoch_string = units.split(' since ')
+    return (parse_epoch(epoch_string),
+            time_unit_to_delta_map.get(time_unit_string))
+
+
+@lru_cache(maxsize=1024)
+def parse_epoch(epoch_string: str) -> datetime:
+    """ Parse the epoch from the `units` of a temporal dimension. Most epochs
+        are ISO-8601 strings, which can be parsed by `datetime.fromisoformat`
+        far more quickly than by `dateutil`, which is used for other formats.
+        Granules in a request usually share an epoch, so results are cached.
+
+    """
+    try:
+        return datetime.fromisoformat(epoch_string)
+    except ValueError:
+        return parse_datetime(epoch_string)
+
+
 def get_nc_attribute(
     variable: Variable, attribute_name: str,
     default_value: Optional[NetCDF4Attribute] = None
@@ -478,6 +575,25 @@ def is_variable_in_dataset(variable_full_path: str, dataset: Dataset) -> bool:
     )
 
 
+def get_matching_indices(sorted_values: np.ndarray,
+                         search_values: np.ndarray) -> np.ndarray:
+    """ Return the indices of elements in a sorted array of unique values
+        that are also in the search values, in ascending order. This gives
+        the same result as `np.where(np.in1d(sorted_values, search_values))`,
+        but uses a binary search for each search value, rather than comparing
+        the two arrays in full.
+
+    """
+    search_values = np.ma.getdata(search_values).ravel()
+    indices = np.searchsorted(sorted_values, search_values)
+    in_range = indices < sorted_values.size
+    matches = np.zeros(search_values.size, dtype=bool)
+    matches[in_range] = (
+        sorted_values[indices[in_range]] == search_values[in_range]
+    )
+    return np.unique(indices[matches])
+
+
 def scale_to_integers(input_floats: np.ndarray) -> Tuple[np.ndarray, float]:
     """ A function that ensures all values in the input array are scaled
         by a power of ten that ensures they are all integers. Integers are
@@ -492,15 +608,23 @@ def scale_to_integers(input_floats: np.ndarray) -> Tuple[np.ndarray, float]:
         will return 1, rather than 0.
 
     """
-    scaled_values = input_floats[:].copy()
+    scaled_values = input_floats
     scale_factor = 1.0
     max_scale_factor = 1e10
 
+    # The check is vectorised with `np.any`, rather than iterating through
+    # the array in Python, and compares against `np.trunc`, which is quicker
+    # than casting to integers. The input is only copied if it needs scaling,
+    # by the first multiplication, after which the copy is scaled in place.
     while (
-        any(np.not_equal(scaled_values, scaled_values.astype(int)))
+        np.any(scaled_values != np.trunc(scaled_values))
         and scale_factor < max_scale_factor
     ):
-        scaled_values = scaled_values * 10
+        if scaled_values is input_floats:
+            scaled_values = scaled_values * 10
+        else:
+            scaled_values *= 10
+
         scale_factor *= 10.0
 
     return np.round(scaled_values).astype(int), scale_factor
@@ -512,27 +636,36 @@ def get_resolution(dimension_values: np.ndarray):
 
         First this function scales all the input values to integers such that
         all significant figures are preserved (e.g., 10.325 becomes 10325).
-        Next the difference between the scaled smallest dimension value and all
-        others are calculated. The `numpy.gcd` function, which requires
-        integer input, is used to find the greatest common divisor of these
-        scaled integers, which represents the output grid resolution scaled by
-        the same factor used to create the integer difference. Finally, the
+        Next the differences between adjacent sorted scaled values are
+        calculated. These have the same greatest common divisor as the
+        differences between the smallest value and all others, but are smaller
+        integers. The `numpy.gcd` function, which requires integer input, is
+        used to find the greatest common divisor of these scaled integers,
+        which represents the output grid resolution scaled by the same factor
+        used to create the integer difference. Finally, the
         greatest common divisor is divided by the scale factor to retrieve the
         grid resolution in the domain of the original dimension values.
 
     """
-    scaled_values, scale_factor = scale_to_integers(dimension_values)
-    scaled_diff_pairs = np.subtract(
-        scaled_values,
-        np.multiply(np.ones_like(dimension_values), scaled_values.min())
+    return get_scaled_resolution(*scale_to_integers(dimension_values))
+
+
+def get_scaled_resolution(scaled_values: np.ndarray, scale_factor: float):
+    """ Calculate the resolution of an input grid from its values, after they
+        have been scaled to integers by `scale_to_integers`. This allows the
+        scaled values to be reused by callers that also need the scale factor.
+
+    """
+    scaled_diff_pairs = np.diff(np.sort(scaled_values))
+    non_zero_diffs = scaled_diff_pairs[scaled_diff_pairs.nonzero()].astype(
+        int, copy=False
     )
-    non_zero_diffs = scaled_diff_pairs[scaled_diff_pairs.nonzero()].astype(int)
     greatest_common_divisor = np.gcd.reduce(non_zero_diffs)
     return np.divide(greatest_common_divisor, scale_factor)
 
 
-def get_grid_values(input_values: np.ndarray,
-                    grid_resolution: np.floating) -> np.ndarray:
+def get_grid_values(input_values: np.ndarray, grid_resolution: np.floating,
+                    scale_factor: Optional[float] = None) -> np.ndarray:
     """ Return a linearly spaced grid that extends from the minimum value of
         the input array to the maximum. The grid spacing will be the supplied
         resolution.
@@ -540,10 +673,11 @@ def get_grid_values(input_values: np.ndarray,
         The scale factor is used to ensure the `np.linspace` output does not
         include recurring decimals. For example, the GPM/IMERG longitude grid
         output dimension previously included -179.8499999999, instead of
-        -179.85.
+        -179.85. The scale factor is calculated if it is not supplied.
 
     """
-    _, scale_factor = scale_to_integers(input_values)
+    if scale_factor is None:
+        _, scale_factor = scale_to_integers(input_values)
 
     grid_max = input_values.max()
     grid_min = input_values.min()
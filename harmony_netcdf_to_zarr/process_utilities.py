@@ -1,21 +1,87 @@
-from multiprocessing import Process
-from multiprocessing.managers import Namespace
+from multiprocessing import Array, Process, Value
+from os import environ
 from time import sleep
-from typing import List
+from typing import Callable, List, Optional
 
 
-def monitor_processes(processes: List[Process], shared_namespace: Namespace, error_notice: str) -> None:
+# Maximum number of bytes retained from an exception message raised in a
+# worker process.
+EXCEPTION_MESSAGE_LENGTH = 512
+
+
+class ProcessErrorState:
+    """ Shared state used by worker processes, and the parent process that
+        monitors them, to signal that an error has occurred. This uses
+        shared memory, rather than a `multiprocessing.Manager` proxy, so
+        checking for an error does not require a round trip to a manager
+        process.
+
+    """
+    EXCEPTION = 1
+    PROCESS_ERROR = 2
+
+    def __init__(self):
+        self._error_flags = Value('b', 0)
+        self._exception_message = Array('c', EXCEPTION_MESSAGE_LENGTH,
+                                        lock=False)
+
+    @property
+    def has_error(self) -> bool:
+        """ Whether any worker has raised an exception or exited with a
+            non-zero exit code.
+
+        """
+        return self._error_flags.value != 0
+
+    @property
+    def has_exception(self) -> bool:
+        return bool(self._error_flags.value & self.EXCEPTION)
+
+    @property
+    def has_process_error(self) -> bool:
+        return bool(self._error_flags.value & self.PROCESS_ERROR)
+
+    @property
+    def exception_message(self) -> str:
+        return self._exception_message.value.decode('utf-8', errors='ignore')
+
+    def set_exception(self, exception: Exception) -> None:
+        """ Save a string message from an exception raised in a worker. Only
+            the first exception is retained.
+
+        """
+        with self._error_flags.get_lock():
+            if not self.has_exception:
+                message = str(exception).encode('utf-8')
+                self._exception_message.value = message[:EXCEPTION_MESSAGE_LENGTH]
+                self._error_flags.value |= self.EXCEPTION
+
+    def set_process_error(self) -> None:
+        with self._error_flags.get_lock():
+            self._error_flags.value |= self.PROCESS_ERROR
+
+
+def monitor_processes(processes: List[Process], error_state: ProcessErrorState,
+                      error_notice: str,
+                      poll_callback: Optional[Callable[[], None]] = None) -> None:
     """Monitor multiprocess processes for errors.
 
     Run and monitor multiprocessing processes ensure successful exits.
+
+    An optional `poll_callback` is called each time the processes are polled,
+    for example to read results from a queue. A process that has put items in
+    a `multiprocessing.Queue` cannot exit until those items have been read.
     """
     for process in processes:
         process.start()
 
     while any(process.is_alive() for process in processes):
         sleep(.5)
+        if poll_callback is not None:
+            poll_callback()
+
         if any(process.exitcode not in [None, 0] for process in processes):
-            shared_namespace.process_error = 'process error occurred'
+            error_state.set_process_error()
 
     exit_codes = []
     for process in processes:
@@ -23,8 +89,30 @@ def monitor_processes(processes: List[Process], shared_namespace: Namespace, err
         exit_codes.append(process.exitcode)
         process.close()
 
-    if hasattr(shared_namespace, 'exception'):
-        raise RuntimeError(f'{error_notice}: {shared_namespace.exception}')
+    if error_state.has_exception:
+        raise RuntimeError(f'{error_notice}: {error_state.exception_message}')
 
-    if hasattr(shared_namespace, 'process_error'):
+    if error_state.has_process_error:
         raise RuntimeError(f'{error_notice}: processes exit codes: {exit_codes}')
+
+
+def get_process_count_limit() -> Optional[int]:
+    """Retrieve an optional cap on the number of worker processes.
+
+    The `HARMONY_CONCURRENCY` environment variable can be used to limit the
+    number of processes used for downloads and Zarr writes, for example when
+    a container has fewer CPUs available than reported by `os.cpu_count`. If
+    the variable is unset, `None` is returned and callers fall back to their
+    own defaults.
+
+    """
+    process_count = environ.get('HARMONY_CONCURRENCY')
+
+    if process_count is None:
+        return None
+
+    if not process_count.isdigit() or int(process_count) < 1:
+        raise ValueError('HARMONY_CONCURRENCY must be a positive integer, '
+                         f'received: "{process_count}"')
+
+    return int(process_count)
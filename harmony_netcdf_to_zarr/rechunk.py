@@ -3,38 +3,42 @@ from __future__ import annotations
 
 from harmony_netcdf_to_zarr.convert import compute_chunksize
 
+from concurrent.futures import ThreadPoolExecutor
 from fsspec.mapping import FSMap
+from logging import Logger
+from shutil import rmtree
 from time import time
 from rechunker import rechunk
-from typing import List, Dict, TYPE_CHECKING
+from typing import List, Dict, MutableMapping, TYPE_CHECKING
 if TYPE_CHECKING:
     from harmony_netcdf_to_zarr.adapter import NetCDFToZarrAdapter
-from zarr import open_consolidated, consolidate_metadata, group as open_zarr_group, Group as zarrGroup
+from zarr import (DirectoryStore, open_consolidated, consolidate_metadata,
+                  group as open_zarr_group, Group as zarrGroup)
 import xarray as xr
 
 
+# The number of threads used to write keys when copying a store to S3.
+STORE_COPY_THREADS = 16
+
+
 def rechunk_zarr(zarr_root: str, chunked_root: str, adapter: NetCDFToZarrAdapter) -> str:
-    """Rechunks the zarr store found at zarr_root location.
+    """Rechunks the local zarr store found at zarr_root location.
 
-    Rechunks the store found at zarr_root, outputing a new rechunked store into
-    chunked root. Finally deleting the input zarr_root store.
+    Rechunks the local DirectoryStore found at zarr_root, outputing a new
+    rechunked store into chunked root in S3. The temporary store used by the
+    rechunker is also written to local disk, alongside zarr_root, so that only
+    the final output is uploaded. Finally deleting the input zarr_root store.
 
     """
     temp_root = zarr_root.replace('.zarr', '_tmp.zarr')
 
-    zarr_store = adapter.s3.get_mapper(root=zarr_root,
-                                       check=False,
-                                       create=False)
-
-    zarr_temp = adapter.s3.get_mapper(root=temp_root, check=False, create=True)
+    zarr_store = DirectoryStore(zarr_root)
+    zarr_temp = DirectoryStore(temp_root)
     zarr_target = adapter.s3.get_mapper(root=chunked_root,
                                         check=False,
-                                        create=True)
+                                        create=False)
 
-    try:
-        adapter.s3.rm(temp_root, recursive=True)
-    except FileNotFoundError:
-        adapter.logger.info(f'Nothing to clean in {temp_root}')
+    rmtree(temp_root, ignore_errors=True)
 
     try:
         adapter.s3.rm(chunked_root, recursive=True)
@@ -42,23 +46,43 @@ def rechunk_zarr(zarr_root: str, chunked_root: str, adapter: NetCDFToZarrAdapter
         adapter.logger.info(f'Nothing to clean in {chunked_root}')
 
     t1 = time()
-    rechunk_zarr_store(zarr_store, zarr_target, zarr_temp)
+    rechunk_zarr_store(zarr_store, zarr_target, zarr_temp, adapter.logger)
     t2 = time()
     adapter.logger.info(f'Function rechunk_zarr_store executed in {(t2-t1):.4f}s')
 
-    adapter.s3.rm(zarr_root, recursive=True)
-    adapter.s3.rm(temp_root, recursive=True)
+    rmtree(zarr_root)
+    rmtree(temp_root, ignore_errors=True)
 
 
 def rechunk_zarr_store(zarr_store: FSMap,
                        zarr_target: FSMap,
-                       zarr_temp: FSMap) -> str:
+                       zarr_temp: FSMap,
+                       logger: Logger = None) -> str:
     """Rechunks a zarr store that was created by the mosaic_to_zarr processes.
 
     This is specific to tuning output zarr store variables to the chunksizes
-    given by compute_chunksize.
+    given by compute_chunksize. If a logger is supplied, the target chunk
+    shape of each rechunked variable is logged.
+
+    If all variables already have their target chunks, for example in a
+    store written from a single granule, the store is copied to the target
+    without decompressing and recompressing every chunk. Keys are written
+    concurrently, as each write to S3 is a separate request.
     """
     target_chunks = get_target_chunks(zarr_store)
+
+    if logger is not None:
+        for variable, chunks in target_chunks.items():
+            if chunks is not None:
+                logger.info(f'Rechunking {variable} to chunks: {chunks}')
+
+    if _has_target_chunks(zarr_store, target_chunks):
+        if logger is not None:
+            logger.info('Zarr store already has target chunks, copying store.')
+
+        _copy_store_concurrently(zarr_store, zarr_target)
+        return
+
     opened_zarr_store = open_consolidated(zarr_store, mode='r')
     # This is a best guess on trial and error with an 8Gi Memory container
     max_memory = '1GB'
@@ -101,6 +125,42 @@ def get_target_chunks(zarr_store: FSMap) -> Dict:
     return target_chunks
 
 
+def _copy_store_concurrently(source: MutableMapping,
+                             target: MutableMapping) -> None:
+    """Copy all keys from the source store to the target store.
+
+    Writes to an S3 store are independent requests, dominated by network
+    latency, so they are issued from a pool of threads rather than one at a
+    time, as with zarr's copy_store. Consolidated metadata are written last,
+    so the target store is only readable once all other keys are written.
+
+    """
+    keys = [key for key in source.keys() if key != '.zmetadata']
+
+    def copy_key(key: str) -> None:
+        target[key] = source[key]
+
+    with ThreadPoolExecutor(max_workers=STORE_COPY_THREADS) as executor:
+        # Consume the results so that any exception is raised.
+        list(executor.map(copy_key, keys))
+
+    if '.zmetadata' in source:
+        copy_key('.zmetadata')
+
+
+def _has_target_chunks(zarr_store: FSMap, target_chunks: Dict) -> bool:
+    """Do all variables in the store already have their target chunks.
+
+    Variables with a target of None, e.g., coordinates, are not rechunked, so
+    are always considered to match.
+
+    """
+    opened_zarr_store = open_consolidated(zarr_store, mode='r')
+    return all(chunks is None
+               or opened_zarr_store[variable].chunks == chunks
+               for variable, chunks in target_chunks.items())
+
+
 def _bounds(variable: str) -> bool:
     """Is a variable a bounds type variable.
 
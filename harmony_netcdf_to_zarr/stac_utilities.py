@@ -54,14 +54,22 @@ def is_netcdf_asset(asset: Asset) -> bool:
                 and asset.href.lower().endswith(VALID_EXTENSIONS)))
 
 
-def get_output_catalog(input_catalog: Catalog, zarr_root: str) -> Catalog:
+def get_output_catalog(input_catalog: Catalog, zarr_root: str,
+                       input_items: Optional[List[Item]] = None) -> Catalog:
     """ Clone the input STAC catalog and add an item for the Zarr store output.
         This item will need to have the correct spatial and temporal
         information, representing the overall ranges from the combined inputs.
 
+        If the input items have already been retrieved, for example from all
+        pages of a paged catalog, they can be supplied to avoid walking the
+        input catalog again.
+
     """
+    if input_items is None:
+        input_items = list(input_catalog.get_items())
+
     output_catalog = Catalog(str(uuid4()), input_catalog.description)
-    output_item = get_output_item(list(input_catalog.get_items()), zarr_root)
+    output_item = get_output_item(input_items, zarr_root)
     output_catalog.add_item(output_item)
 
     return output_catalog
@@ -21,6 +21,7 @@ from zarr import DirectoryStore, open_consolidated
 from harmony.message import Message
 from harmony_netcdf_to_zarr.__main__ import main
 from harmony_netcdf_to_zarr.adapter import NetCDFToZarrAdapter, ZarrException
+from harmony_netcdf_to_zarr.convert import S3_MAX_POOL_CONNECTIONS
 
 from tests.util.file_creation import (ROOT_METADATA_VALUES,
                                       create_full_dataset,
@@ -44,8 +45,8 @@ class TestAdapter(TestCase):
         rmtree(self.temp_dir)
 
     @patch('harmony_netcdf_to_zarr.convert.__copy_aggregated_dimension')
-    @patch('harmony_netcdf_to_zarr.adapter.make_s3fs')
-    @patch('harmony_netcdf_to_zarr.adapter.download_granules')
+    @patch('harmony_netcdf_to_zarr.convert.make_s3fs')
+    @patch('harmony_netcdf_to_zarr.download_utilities.download_granules')
     @patch.dict(os.environ, MOCK_ENV)
     def test_end_to_end_file_conversion(self, mock_download,
                                         mock_make_s3fs_adapter,
@@ -67,13 +68,11 @@ class TestAdapter(TestCase):
 
         """
 
-        local_zarr = DirectoryStore(os.path.join(self.temp_dir, 'test.zarr'))
-        local_tmp_zarr = DirectoryStore(os.path.join(self.temp_dir, 'test_tmp.zarr'))
         local_rechunked_zarr = DirectoryStore(os.path.join(self.temp_dir, 'test_rechunked.zarr'))
 
-        mock_make_s3fs_adapter.return_value.get_mapper.side_effect = [
-            local_zarr, local_zarr, local_tmp_zarr, local_rechunked_zarr
-        ]
+        # Only the rechunked output is written via S3, intermediate stores
+        # are written to local disk.
+        mock_make_s3fs_adapter.return_value.get_mapper.return_value = local_rechunked_zarr
 
         netcdf_file = create_full_dataset()
         stac_catalog_path = create_input_catalog([netcdf_file])
@@ -171,8 +170,8 @@ class TestAdapter(TestCase):
         # 1D Root-Level Float Array sharing its name with a dimension
         self.assertEqual(out['time'][0], 166536)
 
-    @patch('harmony_netcdf_to_zarr.adapter.make_s3fs')
-    @patch('harmony_netcdf_to_zarr.adapter.download_granules')
+    @patch('harmony_netcdf_to_zarr.convert.make_s3fs')
+    @patch('harmony_netcdf_to_zarr.download_utilities.download_granules')
     @patch.dict(os.environ, MOCK_ENV)
     def test_end_to_end_large_file_conversion(self, mock_download,
                                               mock_make_s3fs_adapter):
@@ -183,13 +182,11 @@ class TestAdapter(TestCase):
             incompatibility issues.
 
         """
-        local_zarr = DirectoryStore(os.path.join(self.temp_dir, 'test.zarr'))
-        local_tmp_zarr = DirectoryStore(os.path.join(self.temp_dir, 'test_tmp.zarr'))
         local_rechunked_zarr = DirectoryStore(os.path.join(self.temp_dir, 'test_rechunked.zarr'))
 
-        mock_make_s3fs_adapter.return_value.get_mapper.side_effect = [
-            local_zarr, local_zarr, local_tmp_zarr, local_rechunked_zarr
-        ]
+        # Only the rechunked output is written via S3, intermediate stores
+        # are written to local disk.
+        mock_make_s3fs_adapter.return_value.get_mapper.return_value = local_rechunked_zarr
 
         netcdf_file = create_large_dataset()
         stac_catalog_path = create_input_catalog([netcdf_file])
@@ -226,8 +223,8 @@ class TestAdapter(TestCase):
         self.assertEqual(out['data/var'].chunks, (10000,))
 
     @patch('harmony_netcdf_to_zarr.convert.compute_chunksize')
-    @patch('harmony_netcdf_to_zarr.adapter.make_s3fs')
-    @patch('harmony_netcdf_to_zarr.adapter.download_granules')
+    @patch('harmony_netcdf_to_zarr.convert.make_s3fs')
+    @patch('harmony_netcdf_to_zarr.download_utilities.download_granules')
     @patch.dict(os.environ, MOCK_ENV)
     def test_end_to_end_mosaic(self, mock_download,
                                mock_make_s3fs_adapter, mock_compute_chunksize):
@@ -241,13 +238,11 @@ class TestAdapter(TestCase):
             issues.
 
         """
-        local_zarr = DirectoryStore(os.path.join(self.temp_dir, 'test.zarr'))
-        local_tmp_zarr = DirectoryStore(os.path.join(self.temp_dir, 'test_tmp.zarr'))
         local_rechunked_zarr = DirectoryStore(os.path.join(self.temp_dir, 'test_rechunked.zarr'))
 
-        mock_make_s3fs_adapter.return_value.get_mapper.side_effect = [
-            local_zarr, local_zarr, local_tmp_zarr, local_rechunked_zarr
-        ]
+        # Only the rechunked output is written via S3, intermediate stores
+        # are written to local disk.
+        mock_make_s3fs_adapter.return_value.get_mapper.return_value = local_rechunked_zarr
 
         def chunksize_side_effect(input_array_size, _):
             """ Set compute_chunksize mock to return the input array size """
@@ -380,6 +375,21 @@ class TestAdapter(TestCase):
         main(['harmony_netcdf_to_zarr', '--discord'])
         argparse_error.assert_called_with('Only --harmony CLIs are supported')
 
+    @patch('harmony.setup_cli')
+    def test_help_and_version_do_not_load_harmony(self, mock_setup_cli):
+        """ Ensure requests for help or the service version exit successfully
+            without configuring the full Harmony CLI.
+
+        """
+        for argument in ['--help', '--version']:
+            with self.subTest(argument):
+                with self.assertRaises(SystemExit) as context_manager:
+                    main(['harmony_netcdf_to_zarr', argument])
+
+                self.assertEqual(context_manager.exception.code, 0)
+
+        mock_setup_cli.assert_not_called()
+
     @patch.dict(os.environ, dict(USE_LOCALSTACK='true', LOCALSTACK_HOST='fake-host'))
     def test_localstack_client(self):
         """ Tests that when USE_LOCALSTACK and LOCALSTACK_HOST are supplied the
@@ -389,6 +399,8 @@ class TestAdapter(TestCase):
         adapter = NetCDFToZarrAdapter(Message(mock_message()))
         self.assertEqual(adapter.s3.client_kwargs['endpoint_url'],
                          'http://fake-host:4572')
+        self.assertEqual(adapter.s3.s3.meta.config.max_pool_connections,
+                         S3_MAX_POOL_CONNECTIONS)
 
     @patch.dict(os.environ, MOCK_ENV)
     def test_conversion_failure(self):
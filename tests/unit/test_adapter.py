@@ -40,7 +40,7 @@ class TestNetCDFToZarrAdapter(TestCase):
 
         """
 
-    @patch('harmony_netcdf_to_zarr.adapter.make_localstack_s3fs')
+    @patch('harmony_netcdf_to_zarr.convert.make_localstack_s3fs')
     @patch.object(NetCDFToZarrAdapter, 'process_items_many_to_one')
     def test_invoke_single_input(self, mock_process_items,
                                  mock_make_localstack):
@@ -72,7 +72,7 @@ class TestNetCDFToZarrAdapter(TestCase):
         self.assertEqual(output_message, harmony_message)
         self.assertEqual(output_catalog, mock_output)
 
-    @patch('harmony_netcdf_to_zarr.adapter.make_localstack_s3fs')
+    @patch('harmony_netcdf_to_zarr.convert.make_localstack_s3fs')
     @patch.object(NetCDFToZarrAdapter, 'process_items_many_to_one')
     @patch('harmony.adapter.read_file')
     def test_invoke_multiple_inputs(self, test_patch, mock_process_items,
@@ -115,7 +115,7 @@ class TestNetCDFToZarrAdapter(TestCase):
         self.assertEqual(output_message, harmony_message)
         self.assertEqual(output_catalog, mock_output)
 
-    @patch('harmony_netcdf_to_zarr.adapter.make_localstack_s3fs')
+    @patch('harmony_netcdf_to_zarr.convert.make_localstack_s3fs')
     @patch.object(NetCDFToZarrAdapter, 'process_items_many_to_one')
     def test_invoke_failures_output_format(self, mock_process_items,
                                            mock_make_localstack):
@@ -183,7 +183,7 @@ class TestNetCDFToZarrAdapter(TestCase):
                 'Request failed due to an incorrect service workflow'
             )
 
-    @patch('harmony_netcdf_to_zarr.adapter.make_localstack_s3fs')
+    @patch('harmony_netcdf_to_zarr.convert.make_localstack_s3fs')
     @patch.object(NetCDFToZarrAdapter, 'process_items_many_to_one')
     def test_invoke_failure_no_catalog(self, mock_process_items,
                                        mock_make_localstack):
@@ -205,10 +205,28 @@ class TestNetCDFToZarrAdapter(TestCase):
             'Invoking NetCDF-to-Zarr without STAC catalog is not supported.'
         )
 
-    @patch('harmony_netcdf_to_zarr.adapter.get_output_catalog')
+    @patch.dict('os.environ', {'USE_LOCALSTACK': 'false'})
+    @patch('harmony_netcdf_to_zarr.convert.make_s3fs')
+    def test_s3_created_on_first_use(self, mock_make_s3fs):
+        """ Ensure the S3 file system is not created when the adapter is
+            constructed, but only when first accessed, and then reused.
+
+        """
+        message_content = self.base_message_content.copy()
+        message_content['format'] = {'mime': 'application/x-zarr'}
+        harmony_adapter = NetCDFToZarrAdapter(Message(message_content),
+                                              config=self.harmony_config)
+
+        mock_make_s3fs.assert_not_called()
+
+        self.assertEqual(harmony_adapter.s3, mock_make_s3fs.return_value)
+        self.assertEqual(harmony_adapter.s3, mock_make_s3fs.return_value)
+        mock_make_s3fs.assert_called_once_with()
+
+    @patch('harmony_netcdf_to_zarr.stac_utilities.get_output_catalog')
     @patch('harmony_netcdf_to_zarr.adapter.netcdf_to_zarr')
-    @patch('harmony_netcdf_to_zarr.adapter.download_granules')
-    @patch('harmony_netcdf_to_zarr.adapter.make_localstack_s3fs')
+    @patch('harmony_netcdf_to_zarr.download_utilities.download_granules')
+    @patch('harmony_netcdf_to_zarr.convert.make_localstack_s3fs')
     def process_items_single_item(self, mock_make_localstack, mock_download,
                                   mock_netcdf_to_zarr, mock_get_catalog):
         """ Ensure a single input NetCDF-4 file can be processed. """
@@ -245,10 +263,10 @@ class TestNetCDFToZarrAdapter(TestCase):
         mock_netcdf_to_zarr.assert_called_once_with('local_path.nc4', zarr_store)
         mock_get_catalog.assert_called_once_with(stac_catalog, zarr_store)
 
-    @patch('harmony_netcdf_to_zarr.adapter.get_output_catalog')
+    @patch('harmony_netcdf_to_zarr.stac_utilities.get_output_catalog')
     @patch('harmony_netcdf_to_zarr.adapter.netcdf_to_zarr')
-    @patch('harmony_netcdf_to_zarr.adapter.download_granules')
-    @patch('harmony_netcdf_to_zarr.adapter.make_localstack_s3fs')
+    @patch('harmony_netcdf_to_zarr.download_utilities.download_granules')
+    @patch('harmony_netcdf_to_zarr.convert.make_localstack_s3fs')
     def process_items_multiple(self, mock_make_localstack, mock_download,
                                mock_netcdf_to_zarr, mock_get_catalog):
         """ Ensure multiple input NetCDF-4 files are correctly processed. Prior
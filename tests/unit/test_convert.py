@@ -8,19 +8,30 @@ from pytest import raises
 from shutil import rmtree
 from tempfile import mkdtemp
 from unittest import TestCase
-from unittest.mock import patch, Mock
+from unittest.mock import patch, MagicMock, Mock
 
+from fsspec import get_mapper
+from fsspec.mapping import FSMap
 from netCDF4 import Dataset
 from numpy.testing import assert_array_equal
 from zarr import (DirectoryStore, group as create_zarr_group,
-                  ProcessSynchronizer)
+                  open_consolidated, ProcessSynchronizer)
+from zarr.core import Array as ZarrArray
+from zarr.util import json_loads
 import numpy as np
 
-from harmony_netcdf_to_zarr.convert import (__copy_attrs as copy_attrs,
+from harmony_netcdf_to_zarr.convert import (__cache_source_chunk_row as cache_source_chunk_row,
+                                            __copy_attrs as copy_attrs,
                                             __copy_group as copy_group,
+                                            __copy_variable as copy_variable,
                                             compute_chunksize,
+                                            _consolidate_hierarchy_metadata as consolidate_hierarchy_metadata,
+                                            _finalize_metadata as finalize_metadata,
+                                            granule_chunk_shapes,
                                             __get_aggregated_shape as get_aggregated_shape,
+                                            __get_group_dimension_paths as get_group_dimension_paths,
                                             __insert_data_slice as insert_data_slice,
+                                            __netcdf_attr_to_python as netcdf_attr_to_python,
                                             mosaic_to_zarr)
 from harmony_netcdf_to_zarr.mosaic_utilities import DimensionsMapping
 from tests.util.file_creation import create_gpm_dataset
@@ -79,6 +90,35 @@ class TestConvert(TestCase):
         )
         self.assertEqual(str(execinfo.value), err_message_expected)
 
+    def test_netcdf_attr_to_python(self):
+        """ Ensure NetCDF-4 attribute values are converted to Python primitive
+            types, including the elements of array attributes.
+
+        """
+        test_args = [
+            ['NumPy integer', np.int16(3), 3, int],
+            ['NumPy float', np.float32(1.5), 1.5, float],
+            ['Bytes', b'bytes', 'bytes', str],
+            ['String', 'string', 'string', str],
+            ['Integer array', np.array([1, 2], dtype=np.int8), [1, 2], int],
+            ['Float array', np.array([0.5, 1.5]), [0.5, 1.5], float],
+            ['Bytes array', np.array([b'a', b'b']), ['a', 'b'], str],
+            ['Object array', np.array([b'a', 'b'], dtype=object), ['a', 'b'], str],
+            ['NumPy long long', np.longlong(4), 4, int],
+            ['Python float', 2.5, 2.5, float],
+        ]
+
+        for description, attribute, expected_value, expected_type in test_args:
+            with self.subTest(description):
+                python_value = netcdf_attr_to_python(attribute)
+                self.assertEqual(python_value, expected_value)
+
+                if isinstance(python_value, list):
+                    self.assertTrue(all(isinstance(element, expected_type)
+                                        for element in python_value))
+                else:
+                    self.assertIsInstance(python_value, expected_type)
+
     def test_copy_attrs(self):
         """ Ensure that attributes are copied to a Zarr store, and that any
             pre-existing attributes are not removed or overwritten (either
@@ -213,6 +253,184 @@ class TestConvert(TestCase):
         # Second time slice in the lon/lat plane should still be all fill values:
         assert_array_equal(zarr_variable[1][:], np.ones((3600, 1800)) * -9999.0)
 
+    def test_copy_variable_synchronization(self):
+        """ Ensure chunk locks are only used when the region written for a
+            granule shares chunks with another granule. Attribute updates
+            should always be locked.
+
+        """
+        local_file_one = create_gpm_dataset(self.temp_dir,
+                                            datetime(2021, 2, 28, 3, 30))
+        local_file_two = create_gpm_dataset(self.temp_dir,
+                                            datetime(2021, 2, 28, 4, 00))
+        dim_mapping = DimensionsMapping([local_file_one, local_file_two])
+        variable_path = '/Grid/precipitationCal'
+        metadata_keys = {'.zgroup', 'precipitationCal/.zattrs'}
+
+        with Dataset(local_file_one, 'r') as dataset:
+            with self.subTest('One time value per chunk, no chunk locks'):
+                synchronizer = MagicMock()
+                zarr_group = create_zarr_group(
+                    DirectoryStore(path_join(self.temp_dir, 'aligned.zarr')),
+                    synchronizer=synchronizer
+                )
+                synchronizer.reset_mock()
+
+                copy_variable(dataset['/Grid/precipitationCal'], zarr_group,
+                              'precipitationCal', dim_mapping,
+                              aggregated_dimensions={'/Grid/time'},
+                              variable_chunk_metadata={variable_path: (1, 1800, 1800)})
+
+                locked_keys = {lock_call.args[0] for lock_call
+                               in synchronizer.__getitem__.call_args_list}
+                self.assertSetEqual(locked_keys, metadata_keys)
+                assert_array_equal(zarr_group['precipitationCal'][0],
+                                   dataset['/Grid/precipitationCal'][0])
+
+            with self.subTest('Chunks shared between granules, locks used'):
+                synchronizer = MagicMock()
+                zarr_group = create_zarr_group(
+                    DirectoryStore(path_join(self.temp_dir, 'unaligned.zarr')),
+                    synchronizer=synchronizer
+                )
+                synchronizer.reset_mock()
+
+                copy_variable(dataset['/Grid/precipitationCal'], zarr_group,
+                              'precipitationCal', dim_mapping,
+                              aggregated_dimensions={'/Grid/time'},
+                              variable_chunk_metadata={variable_path: (2, 1800, 1800)})
+
+                locked_keys = {lock_call.args[0] for lock_call
+                               in synchronizer.__getitem__.call_args_list}
+                self.assertTrue(metadata_keys < locked_keys)
+                assert_array_equal(zarr_group['precipitationCal'][0],
+                                   dataset['/Grid/precipitationCal'][0])
+
+    def test_insert_data_slice_multiple_slabs(self):
+        """ Ensure that a variable spanning several output chunks along the
+            first dimension is fully copied, when written in chunk-aligned
+            slabs.
+
+        """
+        test_granule = create_gpm_dataset(self.temp_dir,
+                                          datetime(2021, 2, 28, 3, 30))
+        dim_mapping = DimensionsMapping([test_granule])
+
+        zarr_store = DirectoryStore(path_join(self.temp_dir, 'test.zarr'))
+        zarr_group = create_zarr_group(zarr_store)
+        zarr_variable = zarr_group.create_dataset('lon', shape=(3600,),
+                                                  chunks=(1000,),
+                                                  dtype=np.float64)
+
+        with patch.object(ZarrArray, '__setitem__', autospec=True,
+                          side_effect=ZarrArray.__setitem__) as mock_setitem, \
+                Dataset(test_granule, 'r') as dataset:
+            insert_data_slice(dataset['/Grid/lon'], zarr_variable,
+                              '/Grid/lon', dim_mapping)
+
+            assert_array_equal(zarr_variable[:], dataset['/Grid/lon'][:])
+
+        self.assertListEqual(
+            [call_args[0][1] for call_args in mock_setitem.call_args_list],
+            [(slice(0, 1000),), (slice(1000, 2000),), (slice(2000, 3000),),
+             (slice(3000, 3600),)]
+        )
+
+    def test_granule_chunk_shapes(self):
+        """ Ensure chunk shapes are returned for all variables in a granule,
+            including nested groups, and that results from one granule are
+            not retained in the results for the next granule.
+
+        """
+        gpm_granule = create_gpm_dataset(self.temp_dir,
+                                         datetime(2021, 2, 28, 3, 30))
+        flat_granule = path_join(self.temp_dir, 'flat.nc4')
+
+        with Dataset(flat_granule, 'w') as dataset:
+            dataset.createDimension('x', 10)
+            dataset.createVariable('x', np.float64, ('x',))
+
+        gpm_chunks = granule_chunk_shapes(gpm_granule)
+
+        with Dataset(gpm_granule, 'r') as dataset:
+            precipitation = dataset['/Grid/precipitationCal']
+            self.assertEqual(gpm_chunks['/Grid/precipitationCal'],
+                             compute_chunksize(precipitation.shape,
+                                               precipitation.dtype))
+
+        self.assertIn('/Grid/time', gpm_chunks)
+
+        self.assertDictEqual(granule_chunk_shapes(flat_granule),
+                             {'/x': (10,)})
+
+    def test_cache_source_chunk_row(self):
+        """ Ensure the HDF5 chunk cache of a chunked variable is enlarged to
+            hold a row of on-disk chunks while the variable is copied, and
+            that the original cache settings are restored afterwards.
+
+        """
+        netcdf_path = path_join(self.temp_dir, 'chunked.nc4')
+        input_data = np.arange(200, dtype=np.float64).reshape(10, 20)
+
+        with Dataset(netcdf_path, 'w') as dataset:
+            dataset.createDimension('x', 10)
+            dataset.createDimension('y', 20)
+            chunked = dataset.createVariable('chunked', np.float64, ('x', 'y'),
+                                             chunksizes=(3, 7))
+            chunked[:] = input_data
+            contiguous = dataset.createVariable('contiguous', np.float64,
+                                                ('x', 'y'), contiguous=True)
+            contiguous[:] = input_data
+
+        # A row of on-disk chunks is 3 chunks of 3 x 7 float64 values.
+        expected_row_bytes = 3 * 3 * 7 * 8
+
+        with Dataset(netcdf_path, 'r') as dataset:
+            with self.subTest('Small cache is enlarged'):
+                dataset['chunked'].set_var_chunk_cache(size=100, nelems=2)
+                self.assertTupleEqual(
+                    cache_source_chunk_row(dataset['chunked']), (100, 2, 0.75)
+                )
+                self.assertTupleEqual(dataset['chunked'].get_var_chunk_cache(),
+                                      (expected_row_bytes, 3, 0.75))
+
+            with self.subTest('Sufficient cache is unchanged'):
+                self.assertIsNone(cache_source_chunk_row(dataset['chunked']))
+
+            with self.subTest('Contiguous variable is unchanged'):
+                self.assertIsNone(cache_source_chunk_row(dataset['contiguous']))
+
+            with self.subTest('Cache is restored after copying the variable'):
+                dataset['chunked'].set_var_chunk_cache(size=100, nelems=2)
+                zarr_store = DirectoryStore(path_join(self.temp_dir,
+                                                      'test.zarr'))
+                zarr_variable = create_zarr_group(zarr_store).create_dataset(
+                    'chunked', shape=(10, 20), chunks=(4, 20), dtype=np.float64
+                )
+                insert_data_slice(dataset['chunked'], zarr_variable,
+                                  '/chunked', Mock(output_dimensions={}))
+
+                assert_array_equal(zarr_variable[:], input_data)
+                self.assertTupleEqual(dataset['chunked'].get_var_chunk_cache(),
+                                      (100, 2, 0.75))
+
+    def test_get_group_dimension_paths(self):
+        """ Ensure all dimensions used by variables in a group are resolved
+            to their full paths, relative to that group.
+
+        """
+        test_granule = create_gpm_dataset(self.temp_dir,
+                                          datetime(2021, 2, 28, 3, 30))
+
+        with Dataset(test_granule, 'r') as dataset:
+            dimension_paths = get_group_dimension_paths(dataset['/Grid'])
+
+        self.assertEqual(dimension_paths['time'], '/Grid/time')
+        self.assertEqual(dimension_paths['lat'], '/Grid/lat')
+        self.assertEqual(dimension_paths['lon'], '/Grid/lon')
+        # There is no variable for the bounds dimension in the group.
+        self.assertEqual(dimension_paths['latv'], '/latv')
+
     @patch('harmony_netcdf_to_zarr.convert.__copy_variable')
     def test_copy_group(self, mock_copy_variable):
         """ Ensure that the copy_group function recurses to the point where
@@ -246,6 +464,84 @@ class TestConvert(TestCase):
 
         self.assertSetEqual(all_input_variables, all_output_variables)
 
+    @patch('harmony_netcdf_to_zarr.convert._consolidate_hierarchy_metadata')
+    @patch('harmony_netcdf_to_zarr.convert.consolidate_metadata')
+    def test_finalize_metadata(self, mock_consolidate_metadata,
+                               mock_consolidate_hierarchy_metadata):
+        """ Ensure stores are prepared for metadata consolidation according
+            to their type, and that metadata are always consolidated.
+
+        """
+        with self.subTest('DirectoryStore hierarchy is consolidated directly'):
+            store = MagicMock(spec=DirectoryStore)
+            finalize_metadata(store)
+            store.__setitem__.assert_not_called()
+            mock_consolidate_hierarchy_metadata.assert_called_once_with(store)
+            mock_consolidate_metadata.assert_not_called()
+
+        mock_consolidate_hierarchy_metadata.reset_mock()
+
+        with self.subTest('FSMap cache is invalidated'):
+            store = MagicMock(spec=FSMap)
+            store.fs = Mock()
+            store.root = 'bucket/output.zarr'
+            finalize_metadata(store)
+            store.fs.invalidate_cache.assert_called_once_with('bucket/output.zarr')
+            store.__setitem__.assert_not_called()
+            mock_consolidate_hierarchy_metadata.assert_called_once_with(store)
+            mock_consolidate_metadata.assert_not_called()
+
+        mock_consolidate_hierarchy_metadata.reset_mock()
+
+        with self.subTest('Other stores are not modified'):
+            store = MagicMock()
+            finalize_metadata(store)
+            store.__setitem__.assert_not_called()
+            store.__delitem__.assert_not_called()
+            mock_consolidate_metadata.assert_called_once_with(store)
+            mock_consolidate_hierarchy_metadata.assert_not_called()
+
+    def test_consolidate_hierarchy_metadata(self):
+        """ Ensure the consolidated metadata written by walking the group
+            hierarchy match those that zarr would find by iterating through
+            every key in the store, for both local and fsspec stores.
+
+        """
+        memory_store = get_mapper(f'memory://{self.temp_dir}/output.zarr')
+        stores = {'DirectoryStore': DirectoryStore(path_join(self.temp_dir,
+                                                             'output.zarr')),
+                  'FSMap': memory_store}
+
+        for description, store in stores.items():
+            with self.subTest(description):
+                root = create_zarr_group(store)
+                root.attrs['title'] = 'Test store'
+                root.zeros('lat', shape=(4,), chunks=(2,)).attrs['units'] = 'degrees_north'
+                group = root.create_group('science')
+                group.zeros('data', shape=(4, 4), chunks=(2, 2))
+                nested_group = group.create_group('nested')
+                nested_group.attrs['description'] = 'Nested group'
+                nested_group.zeros('flag', shape=(2,), chunks=(1,))
+
+                expected_metadata = {
+                    key: json_loads(store[key]) for key in store
+                    if key.rsplit('/', 1)[-1] in ('.zarray', '.zattrs', '.zgroup')
+                }
+
+                consolidate_hierarchy_metadata(store)
+
+                self.assertDictEqual(
+                    json_loads(store['.zmetadata']),
+                    {'zarr_consolidated_format': 1,
+                     'metadata': expected_metadata}
+                )
+                self.assertListEqual(
+                    sorted(open_consolidated(store).group_keys()),
+                    ['science']
+                )
+
+        memory_store.fs.rm(memory_store.root, recursive=True)
+
     @patch('harmony_netcdf_to_zarr.convert.granule_chunk_shapes')
     @patch('harmony_netcdf_to_zarr.convert.Process')
     def test_failed_multiprocess(self, mock_process, mock_chunks):
@@ -256,7 +552,7 @@ class TestConvert(TestCase):
         test_granule = create_gpm_dataset(self.temp_dir,
                                           datetime(2021, 2, 28, 3, 30))
 
-        mock_chunks.returns = {'unusedShapes': ()}
+        mock_chunks.return_value = {'unusedShapes': ()}
         zarr_store = DirectoryStore(path_join(self.temp_dir, 'test.zarr'))
 
         # Set up process.is_alive return values
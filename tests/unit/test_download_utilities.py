@@ -60,6 +60,64 @@ class TestDownloadUtilities(TestCase):
             set(self.local_paths)
         )
 
+    def test_download_granules_process_count(self):
+        """ Check that a user-supplied number of processes still downloads
+            all requested files.
+
+        """
+        self.assertSetEqual(
+            set(download_granules(self.netcdf_urls, self.temp_dir,
+                                  self.access_token, self.harmony_config,
+                                  self.logger, process_count=2)),
+            set(self.local_paths)
+        )
+
+    def test_download_granules_many_results(self):
+        """ Check that all local paths are returned when they exceed the
+            capacity of the pipe underlying the results queue, so that the
+            workers are only able to exit if the paths are read while they
+            are running. `file://` URLs are not copied, so the files do not
+            need to exist.
+
+        """
+        netcdf_urls = [f'file://{self.temp_dir}/{index:04d}_{"granule" * 20}.nc4'
+                       for index in range(2000)]
+        expected_paths = {netcdf_url.replace('file://', '')
+                          for netcdf_url in netcdf_urls}
+
+        self.assertSetEqual(
+            set(download_granules(netcdf_urls, self.temp_dir,
+                                  self.access_token, self.harmony_config,
+                                  self.logger, process_count=2)),
+            expected_paths
+        )
+
+    @patch('harmony_netcdf_to_zarr.download_utilities.cpu_count')
+    @patch('harmony_netcdf_to_zarr.download_utilities.Process')
+    def test_download_granules_number_of_processes(self, mock_process,
+                                                   mock_cpu_count):
+        """ Check that the number of download processes is allowed to exceed
+            the number of CPUs, but not the number of requested files.
+
+        """
+        mock_cpu_count.return_value = 1
+        mock_process.return_value.is_alive.return_value = False
+        mock_process.return_value.exitcode = 0
+
+        with self.subTest('Default scales with number of CPUs'):
+            download_granules(self.netcdf_urls, self.temp_dir,
+                              self.access_token, self.harmony_config,
+                              self.logger)
+            self.assertEqual(mock_process.call_count, 2)
+
+        mock_process.reset_mock()
+
+        with self.subTest('User-supplied count limited by number of files'):
+            download_granules(self.netcdf_urls, self.temp_dir,
+                              self.access_token, self.harmony_config,
+                              self.logger, process_count=5)
+            self.assertEqual(mock_process.call_count, 3)
+
     def test_download_granules_failure(self):
         """ Check that a RuntimeError is raises, as expected, if there is an
             error downloading one of the granules. In this test, the error will
@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 from unittest.mock import call, patch
 from unittest import TestCase
 
+from dateutil.parser import parse as parse_datetime
 from netCDF4 import Dataset
 import numpy as np
 from numpy.testing import assert_array_equal
@@ -10,10 +11,13 @@ from numpy.testing import assert_array_equal
 from harmony_netcdf_to_zarr.mosaic_utilities import (DimensionInformation,
                                                      DimensionsMapping,
                                                      get_grid_values,
+                                                     get_matching_indices,
                                                      get_nc_attribute,
                                                      get_resolution,
+                                                     get_scaled_resolution,
                                                      is_variable_in_dataset,
                                                      NetCDF4DimensionInformation,
+                                                     parse_epoch,
                                                      resolve_reference_path,
                                                      scale_to_integers)
 
@@ -231,6 +235,23 @@ class TestMosaicUtilities(TestCase):
         # Ensure no aggregated output dimensions were derived:
         self.assertDictEqual(dimensions_mapping.output_dimensions, {})
 
+    @patch('harmony_netcdf_to_zarr.mosaic_utilities.is_variable_in_dataset',
+           wraps=is_variable_in_dataset)
+    @patch('harmony_netcdf_to_zarr.mosaic_utilities.Dataset')
+    def test_dimensions_mapping_parses_dimension_once(self, mock_dataset,
+                                                      mock_is_variable_in_dataset):
+        """ Ensure each dimension is only checked once per input file, even
+            though it is referred to by several variables, in several groups.
+
+        """
+        mock_dataset.return_value = self.test_dataset
+
+        dimensions_mapping = DimensionsMapping([self.test_dataset_path])
+
+        self.assertSetEqual(set(dimensions_mapping.input_dimensions.keys()),
+                            {'/latitude', '/longitude', '/time'})
+        self.assertEqual(mock_is_variable_in_dataset.call_count, 3)
+
     @patch('harmony_netcdf_to_zarr.mosaic_utilities.Dataset')
     def test_dimensions_mapping_output_merra(self, mock_dataset):
         """ Test that the `DimensionsMapping.output_dimensions` mapping is
@@ -694,6 +715,29 @@ class TestMosaicUtilities(TestCase):
                 if dataset.isopen():
                     dataset.close()
 
+        with self.subTest('Missing bounds are filled from the median offsets'):
+            # Reuses the mapping from the discontinuous input granules, with
+            # a regular output grid that includes the gap between inputs.
+            bounds_path, bounds_values = mapping._get_dimension_bounds(
+                '/dim', np.linspace(0, 11, 12)
+            )
+
+            expected_output_bounds = np.array([[-0.5, 0.5],
+                                               [0.5, 1.5],
+                                               [1.5, 2.5],
+                                               [2.5, 3.5],
+                                               [3.5, 4.5],
+                                               [4.5, 5.5],
+                                               [5.5, 6.5],
+                                               [6.5, 7.5],
+                                               [7.5, 8.5],
+                                               [8.5, 9.5],
+                                               [9.5, 10.5],
+                                               [10.5, 11.5]])
+
+            self.assertEqual(bounds_path, '/dim_bnds')
+            assert_array_equal(bounds_values, expected_output_bounds)
+
     def test_dimension_information(self):
         """ Ensure the base class can be instantiated with values, units and,
             where required, temporal unit and epoch information.
@@ -790,6 +834,36 @@ class TestMosaicUtilities(TestCase):
                 values_with_output_epoch
             )
 
+        with self.subTest('Constant epoch offset does not use cftime.'):
+            temporal_dimension = DimensionInformation('/variable',
+                                                      dimension_values,
+                                                      input_temporal_units)
+
+            with patch('harmony_netcdf_to_zarr.mosaic_utilities.num2date') as mock_num2date:
+                output_values = temporal_dimension.get_values(output_temporal_units)
+                mock_num2date.assert_not_called()
+
+            assert_array_equal(output_values, values_with_output_epoch)
+            self.assertEqual(output_values.dtype, np.int64)
+
+        with self.subTest('Change of time unit uses cftime.'):
+            temporal_dimension = DimensionInformation('/variable',
+                                                      dimension_values,
+                                                      input_temporal_units)
+            assert_array_equal(
+                temporal_dimension.get_values('hours since 2021-01-01T00:30:00'),
+                np.divide(values_with_output_epoch, 60.0)
+            )
+
+        with self.subTest('Non-integer values use cftime.'):
+            temporal_dimension = DimensionInformation('/variable',
+                                                      np.array([0.5, 1.5]),
+                                                      input_temporal_units)
+            assert_array_equal(
+                temporal_dimension.get_values(output_temporal_units),
+                np.array([1440.5, 1441.5])
+            )
+
     def test_netcdf4_dimension_information(self):
         """ Ensure a dimension variable will have the expected information
             extracted from the NetCDF-4 file, including path, values,
@@ -853,6 +927,28 @@ class TestMosaicUtilities(TestCase):
             if bounds_dataset.isopen():
                 bounds_dataset.close()
 
+    @patch('harmony_netcdf_to_zarr.mosaic_utilities.parse_datetime',
+           wraps=parse_datetime)
+    def test_parse_epoch(self, mock_parse_datetime):
+        """ Ensure ISO-8601 epochs are parsed without `dateutil`, that other
+            formats fall back to `dateutil`, and that results are cached.
+
+        """
+        parse_epoch.cache_clear()
+
+        with self.subTest('ISO-8601 epoch'):
+            self.assertEqual(parse_epoch('2020-01-27T14:00:00'),
+                             self.test_epoch)
+            mock_parse_datetime.assert_not_called()
+
+        with self.subTest('Other epoch formats use dateutil'):
+            self.assertEqual(parse_epoch('2020-1-27 14:0:0'), self.test_epoch)
+            mock_parse_datetime.assert_called_once_with('2020-1-27 14:0:0')
+
+        with self.subTest('Repeated epochs are cached'):
+            parse_epoch('2020-1-27 14:0:0')
+            mock_parse_datetime.assert_called_once()
+
     def test_get_nc_attribute(self):
         """ Ensure the helper function wrapping the `getncattr` class method
             can handle present and absent attributes, including when a
@@ -952,6 +1048,39 @@ class TestMosaicUtilities(TestCase):
             self.assertFalse(is_variable_in_dataset('/missing_group/variable',
                                                     self.test_dataset))
 
+    def test_get_matching_indices(self):
+        """ Ensure the indices of the sorted values that are also in the
+            search values are returned in ascending order, matching the
+            output of `np.where(np.in1d(...))`.
+
+        """
+        sorted_values = np.array([0.5, 1.0, 1.5, 2.0, 2.5])
+
+        with self.subTest('All search values present'):
+            assert_array_equal(
+                get_matching_indices(sorted_values, np.array([1.0, 1.5, 2.0])),
+                np.array([1, 2, 3])
+            )
+
+        with self.subTest('Unordered search values'):
+            assert_array_equal(
+                get_matching_indices(sorted_values, np.array([2.5, 0.5])),
+                np.array([0, 4])
+            )
+
+        with self.subTest('Search values outside the sorted range are ignored'):
+            assert_array_equal(
+                get_matching_indices(sorted_values,
+                                     np.array([-1.0, 1.25, 2.0, 3.0])),
+                np.array([3])
+            )
+
+        with self.subTest('No matching values'):
+            assert_array_equal(
+                get_matching_indices(sorted_values, np.array([0.75, 4.0])),
+                np.array([], dtype=int)
+            )
+
     def test_scale_to_integers(self):
         """ Ensure the input array is scaled such that all values are integers.
             These integers should equal the original values scaled by the
@@ -981,6 +1110,11 @@ class TestMosaicUtilities(TestCase):
             assert_array_equal(output_integers, np.array([0, 1e10, 2e10]))
             self.assertEqual(scale_factor, 1e10)
 
+        with self.subTest('Input array is not modified'):
+            input_values = np.array([0.5, 1.25])
+            scale_to_integers(input_values)
+            assert_array_equal(input_values, np.array([0.5, 1.25]))
+
     def test_get_resolution(self):
         """ Ensure the correct resolution is calculated for input values. This
             function also needs to be able to handle the case of a single input
@@ -1003,6 +1137,12 @@ class TestMosaicUtilities(TestCase):
                 self.assertEqual(get_resolution(input_values),
                                  expected_resolution)
 
+            with self.subTest(f'{description} - pre-scaled values'):
+                self.assertEqual(
+                    get_scaled_resolution(*scale_to_integers(input_values)),
+                    expected_resolution
+                )
+
     def test_get_grid_values(self):
         """ Ensure that a linearly spaced grid is returned. It should have a
             spacing corresponding to the supplied resolution and all input
@@ -1024,6 +1164,12 @@ class TestMosaicUtilities(TestCase):
             self.assertEqual(output_grid.min(), input_values.min())
             self.assertEqual(output_grid.max(), input_values.max())
 
+        with self.subTest('Supplied scale factor.'):
+            input_values = np.array([0.25, 0.0, 0.625])
+            output_grid = get_grid_values(input_values, 0.125, 1000.0)
+            assert_array_equal(output_grid,
+                               np.array([0.0, 0.125, 0.25, 0.375, 0.5, 0.625]))
+
         with self.subTest('Single input values.'):
             input_values = np.array([0.25])
             output_grid = get_grid_values(input_values, 0.0)
@@ -0,0 +1,119 @@
+""" Unit tests for the `harmony_netcdf_to_zarr.process_utilities` module. """
+from multiprocessing import Process
+from os import environ
+from time import sleep
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from harmony_netcdf_to_zarr.process_utilities import (EXCEPTION_MESSAGE_LENGTH,
+                                                      get_process_count_limit,
+                                                      monitor_processes,
+                                                      ProcessErrorState)
+
+
+def _failing_worker(error_state: ProcessErrorState):
+    """ A worker that records an exception, as the service workers do. """
+    exception = ValueError('Bad granule')
+    error_state.set_exception(exception)
+    raise exception
+
+
+def _exiting_worker(exit_code: int):
+    """ A worker that exits with the specified exit code. """
+    raise SystemExit(exit_code)
+
+
+class TestProcessUtilities(TestCase):
+    """ Tests the functions in `harmony_netcdf_to_zarr.process_utilities`. """
+
+    def test_get_process_count_limit(self):
+        """ Ensure the optional process limit is read from the environment,
+            and that invalid values are rejected.
+
+        """
+        with self.subTest('Environment variable unset'):
+            with patch.dict(environ, clear=True):
+                self.assertIsNone(get_process_count_limit())
+
+        with self.subTest('Valid process count'):
+            with patch.dict(environ, {'HARMONY_CONCURRENCY': '3'}):
+                self.assertEqual(get_process_count_limit(), 3)
+
+        for invalid_value in ['0', '-2', 'four']:
+            with self.subTest(f'Invalid process count: {invalid_value}'):
+                with patch.dict(environ, {'HARMONY_CONCURRENCY': invalid_value}):
+                    with self.assertRaises(ValueError):
+                        get_process_count_limit()
+
+    def test_process_error_state(self):
+        """ Ensure only the first exception message is retained, and that
+            long messages are truncated to fit the shared array.
+
+        """
+        with self.subTest('No errors'):
+            error_state = ProcessErrorState()
+            self.assertFalse(error_state.has_error)
+            self.assertFalse(error_state.has_exception)
+            self.assertFalse(error_state.has_process_error)
+
+        with self.subTest('First exception is retained'):
+            error_state = ProcessErrorState()
+            error_state.set_exception(ValueError('First'))
+            error_state.set_exception(ValueError('Second'))
+            self.assertTrue(error_state.has_error)
+            self.assertTrue(error_state.has_exception)
+            self.assertEqual(error_state.exception_message, 'First')
+
+        with self.subTest('Long messages are truncated'):
+            error_state = ProcessErrorState()
+            error_state.set_exception(ValueError('a' * 1000))
+            self.assertEqual(error_state.exception_message,
+                             'a' * EXCEPTION_MESSAGE_LENGTH)
+
+        with self.subTest('Process error'):
+            error_state = ProcessErrorState()
+            error_state.set_process_error()
+            self.assertTrue(error_state.has_error)
+            self.assertFalse(error_state.has_exception)
+            self.assertTrue(error_state.has_process_error)
+
+    def test_monitor_processes(self):
+        """ Ensure successful processes complete, and that errors in worker
+            processes are raised in the parent process.
+
+        """
+        with self.subTest('Successful processes'):
+            error_state = ProcessErrorState()
+            processes = [Process(target=_exiting_worker, args=(0,))
+                         for _ in range(2)]
+            monitor_processes(processes, error_state, 'Failed')
+            self.assertFalse(error_state.has_error)
+
+        with self.subTest('Exception raised in worker'):
+            error_state = ProcessErrorState()
+            processes = [Process(target=_failing_worker, args=(error_state,))]
+
+            with self.assertRaises(RuntimeError) as context_manager:
+                monitor_processes(processes, error_state, 'Failed')
+
+            self.assertEqual(str(context_manager.exception),
+                             'Failed: Bad granule')
+
+        with self.subTest('Non-zero exit code'):
+            error_state = ProcessErrorState()
+            processes = [Process(target=_exiting_worker, args=(3,))]
+
+            with self.assertRaises(RuntimeError) as context_manager:
+                monitor_processes(processes, error_state, 'Failed')
+
+            self.assertEqual(str(context_manager.exception),
+                             'Failed: processes exit codes: [3]')
+
+        with self.subTest('Poll callback is called while processes run'):
+            error_state = ProcessErrorState()
+            poll_callback = Mock()
+            processes = [Process(target=sleep, args=(1,))]
+            monitor_processes(processes, error_state, 'Failed',
+                              poll_callback=poll_callback)
+            self.assertFalse(error_state.has_error)
+            poll_callback.assert_called()
@@ -4,10 +4,12 @@ import numpy as np
 from shutil import rmtree
 from tempfile import mkdtemp, TemporaryDirectory
 from unittest import TestCase
+from unittest.mock import patch
 import xarray as xr
 import zarr
 
-from harmony_netcdf_to_zarr.rechunk import (_groups_from_zarr,
+from harmony_netcdf_to_zarr.rechunk import (_copy_store_concurrently,
+                                            _groups_from_zarr,
                                             get_target_chunks,
                                             rechunk_zarr_store)
 
@@ -21,7 +23,7 @@ class TestRechunk(TestCase):
     def tearDown(self):
         rmtree(self.tmp_dir)
 
-    def create_basic_store(self, location, groups=['']):
+    def create_basic_store(self, location, groups=[''], encoding=None):
         """Creates a basic dataset for testing.
 
         Creates 4 variables [lon, lat, temperature, and precipitation],
@@ -31,7 +33,7 @@ class TestRechunk(TestCase):
         Optionally, if the groups variable contains an array of values, each of
         these will be used as groups and the same 4 variables will also be
         written to the group.  This is only for testing nested zarr
-        stores.
+        stores. An optional encoding can be used to set output chunks.
 
         """
         lon = np.arange(-180, 180, step=.1)
@@ -50,7 +52,8 @@ class TestRechunk(TestCase):
             attrs=dict(description="sample dataset."),
         )
         for group in groups:
-            ds.to_zarr(location, group=group, consolidated=True)
+            ds.to_zarr(location, group=group, consolidated=True,
+                       encoding=encoding)
 
         zarr.consolidate_metadata(location)
 
@@ -142,3 +145,41 @@ class TestRechunk(TestCase):
             actual_temperature_chunks = target_zarr['temperature'].chunks
             self.assertEqual((3600, 1800), actual_temperature_chunks)
             self.assertEqual((1402, 1402), actual_precipitation_chunks)
+
+    def test_copy_store_concurrently(self):
+        """Test all keys are copied, with consolidated metadata written last."""
+        source = {'.zgroup': b'group', '.zmetadata': b'metadata',
+                  'var/.zarray': b'array', 'var/0': b'chunk 0',
+                  'var/1': b'chunk 1'}
+        target = {}
+
+        _copy_store_concurrently(source, target)
+
+        self.assertDictEqual(target, source)
+        self.assertEqual(list(target.keys())[-1], '.zmetadata')
+
+    @patch('harmony_netcdf_to_zarr.rechunk.rechunk')
+    def test_rechunking_target_chunks_already_match(self, mock_rechunk):
+        """Test a store already using the target chunks is copied as-is."""
+        with TemporaryDirectory() as store_location, \
+             TemporaryDirectory() as tmp_location, \
+             TemporaryDirectory() as target_location:
+
+            self.create_basic_store(
+                store_location,
+                encoding={'precipitation': {'chunks': (1402, 1402)},
+                          'temperature': {'chunks': (3600, 1800)}}
+            )
+
+            rechunk_zarr_store(zarr.DirectoryStore(store_location),
+                               zarr.DirectoryStore(target_location),
+                               zarr.DirectoryStore(tmp_location))
+            mock_rechunk.assert_not_called()
+
+            target_zarr = zarr.open_consolidated(target_location)
+            self.assertEqual((3600, 1800), target_zarr['temperature'].chunks)
+            self.assertEqual((1402, 1402), target_zarr['precipitation'].chunks)
+            np.testing.assert_array_equal(target_zarr['precipitation'][:],
+                                          np.ones((3600, 1800)))
+            self.assertEqual(target_zarr.attrs['description'],
+                             'sample dataset.')
@@ -142,6 +142,15 @@ class TestStacUtilities(TestCase):
         self.assertEqual(output_items[0].common_metadata.end_datetime,
                          self.datetime_four)
 
+        with self.subTest('Supplied input items are used'):
+            output_catalog = get_output_catalog(input_catalog, zarr_root,
+                                                [input_item_two])
+            output_items = list(output_catalog.get_items())
+            self.assertEqual(len(output_items), 1)
+            self.assertListEqual(output_items[0].bbox, self.bbox_two)
+            self.assertEqual(output_items[0].common_metadata.start_datetime,
+                             self.datetime_four)
+
     def test_get_output_item(self):
         """ Ensure that a single `pystac.Item` is created that combines the
             spatial and temporal extents of the supplied input items.